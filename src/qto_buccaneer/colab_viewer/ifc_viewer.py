@@ -1,169 +1,314 @@
-"""
-IFC Viewer Module for qto_buccaneer
-Main entry point for interactive 3D visualization of IFC models in Jupyter/Colab notebooks.
-"""
-
-import traceback
-from pathlib import Path
-from .ifc_viewer_loader import IFCDownloader
-from .ifc_viewer_geometry import GeometryExtractor
-from .ifc_viewer_hierarchy import HierarchicalStructure
-from .ifc_viewer_visualizer import Visualizer3D
-
-
-def visualize_ifc(
-    ifc_source,
-    color_config_path=None,
-    show_ui=True,
-    verbose=False
-):
-    """
-    Visualize an IFC model in 3D with optional color configuration.
-    
-    This is the main entry point for the IFC viewer. It handles loading,
-    processing, and displaying IFC models with minimal code required.
-    
-    Parameters:
-    -----------
-    ifc_source : str
-        Path to IFC file (local path or URL)
-    color_config_path : str, optional
-        Path to YAML color configuration file
-        Default: uses built-in abstractBIM_plots_config.yaml
-    show_ui : bool, default=True
-        Whether to show the interactive UI (filters, table, properties)
-        If False, only shows the 3D viewer
-    verbose : bool, default=False
-        Whether to print detailed processing information
-        
-    Returns:
-    --------
-    tuple
-        (visualizer, hierarchy, ui) if show_ui=True
-        (visualizer, hierarchy) if show_ui=False
-        
-    Example:
-    --------
-    ```python
-    # Simple usage with URL
-    from qto_buccaneer import visualize_ifc
-    
-    url = "https://example.com/model.ifc"
-    visualize_ifc(url)
-    
-    # With custom color config
-    visualize_ifc(
-        "path/to/model.ifc",
-        color_config_path="path/to/colors.yaml"
-    )
-    
-    # Just 3D view, no UI
-    viz, hier = visualize_ifc(
-        "model.ifc",
-        show_ui=False
-    )
-    ```
-    """
-    try:
-        # Determine color config path
-        if color_config_path is None:
-            # Use default config from package (colab_viewer/configs/)
-            package_dir = Path(__file__).parent
-            color_config_path = package_dir / "configs" / "default_colors.yaml"
-            if not color_config_path.exists():
-                # Fallback to main configs folder
-                color_config_path = package_dir.parent / "configs" / "abstractBIM_plots_config.yaml"
-                if not color_config_path.exists():
-                    color_config_path = None
-        
-        if verbose:
-            print(f"🚀 Starting IFC file processing...")
-            print(f"📂 Source: {ifc_source}")
-            if color_config_path:
-                print(f"🎨 Color config: {color_config_path}")
-            print("-" * 80)
-        
-        # Load IFC model
-        model = IFCDownloader.download_and_load(ifc_source)
-        
-        # Build hierarchy
-        hierarchy_builder = HierarchicalStructure(model)
-        hierarchy = hierarchy_builder.get_hierarchy()
-        
-        # Initialize geometry extractor with colors
-        geometry_extractor = GeometryExtractor(color_config_path)
-        
-        # Initialize visualizer
-        visualizer = Visualizer3D(geometry_extractor)
-        
-        if verbose:
-            print("\n🔍 Extracting and processing geometry and QTO properties...")
-        
-        processed_count = 0
-        total_elements = 0
-        
-        for storey_name, types in hierarchy.items():
-            for ifc_type, elements in types.items():
-                total_elements += len(elements)
-                for element in elements:
-                    mesh_json = GeometryExtractor.extract_custom_mesh_from_entity(element)
-                    if mesh_json:
-                        qto_props = GeometryExtractor.extract_qto_properties(element, model)
-                        hierarchy_path = f"{storey_name}/{ifc_type}"
-                        visualizer.add_mesh_from_element(element, mesh_json, hierarchy_path, qto_props)
-                        processed_count += 1
-                    elif verbose:
-                        print(f"⚠️ Element {element.GlobalId} ({element.is_a()}) does not have Custom_Mesh")
-        
-        if processed_count == 0:
-            print("⚠️ No elements with Custom_Mesh properties found.")
-            print("🔍 Check that the IFC file contains Pset_CustomGeometry properties with Custom_Mesh")
-            return None
-        
-        if verbose:
-            print(f"📊 Total elements in structure: {total_elements}")
-            print(f"📊 Elements processed with geometry: {processed_count}")
-            print(f"✅ {processed_count} elements with geometry processed!")
-        
-        visualizer.configure_layout()
-        
-        if show_ui:
-            # Import UI module only if needed (requires ipywidgets)
-            try:
-                from .ifc_viewer_ui import HierarchicalTableUI
-                ui = HierarchicalTableUI(hierarchy, visualizer, model)
-                ui_widget = ui.create_ui()
-                
-                if verbose:
-                    print("\n✅ Full visualization! Use the table for selection and the panel for visibility.")
-                
-                # Return the widget directly - Jupyter will display it automatically
-                return ui_widget
-            except ImportError as e:
-                print(f"⚠️ ipywidgets not available. Showing 3D view only.")
-                if verbose:
-                    print(f"   Error: {e}")
-                    print("   Install with: !pip install ipywidgets")
-                from IPython.display import display
-                display(visualizer.fig)
-                return visualizer, hierarchy
-            except Exception as e:
-                print(f"⚠️ Error loading UI. Showing 3D view only.")
-                if verbose:
-                    print(f"   Error: {e}")
-                    import traceback
-                    print(traceback.format_exc())
-                from IPython.display import display
-                display(visualizer.fig)
-                return visualizer, hierarchy
-        else:
-            # Just show the 3D figure
-            from IPython.display import display
-            display(visualizer.fig)
-            return visualizer, hierarchy
-            
-    except Exception as e:
-        print(f"❌ General error: {e}")
-        if verbose:
-            print(traceback.format_exc())
-        return None
+"""
+IFC Viewer Module for qto_buccaneer
+Main entry point for interactive 3D visualization of IFC models in Jupyter/Colab notebooks.
+"""
+
+import os
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .ifc_viewer_loader import IFCDownloader
+from .ifc_viewer_geometry import GeometryExtractor
+from .ifc_viewer_hierarchy import HierarchicalStructure
+from .ifc_viewer_visualizer import Visualizer3D
+
+
+def _process_with_geom_iterator(model, visualizer, geometry_extractor, verbose=False):
+    """
+    Tessellate model geometry with ifcopenshell's multicore iterator.
+
+    Fallback for models without Pset_CustomGeometry: the iterator runs
+    shape creation in C++ across all cores and hands back triangulated
+    vertices/faces that map into NumPy without per-element Python work.
+
+    Returns:
+    --------
+    int
+        Number of elements added to the visualizer
+    """
+    try:
+        import multiprocessing
+        import numpy as np
+        import ifcopenshell.geom
+    except ImportError:
+        return 0
+
+    try:
+        settings = ifcopenshell.geom.settings()
+        try:
+            # ifcopenshell >= 0.8 keys settings by name
+            settings.set("use-world-coords", True)
+        except Exception:
+            # 0.7 constant-based API
+            settings.set(settings.USE_WORLD_COORDS, True)
+        iterator = ifcopenshell.geom.iterator(settings, model, multiprocessing.cpu_count())
+    except Exception as e:
+        # A broken setup is worth a warning even without verbose: the
+        # fallback would otherwise vanish silently
+        print(f"⚠️ Geometry iterator unavailable: {e}")
+        return 0
+
+    if not iterator.initialize():
+        # Not an error: the model simply has no tessellatable geometry
+        if verbose:
+            print("ℹ️ Geometry iterator found no shapes to tessellate")
+        return 0
+
+    processed_count = 0
+    while True:
+        shape = iterator.get()
+        try:
+            element = model.by_guid(shape.guid)
+            vertices = np.array(shape.geometry.verts, dtype=np.float32).reshape(-1, 3)
+            faces = np.array(shape.geometry.faces, dtype=np.uint32).reshape(-1, 3)
+            if len(vertices) and len(faces):
+                ifc_type = element.is_a()
+                config_color = geometry_extractor.get_color_for_type(ifc_type)
+                visualizer.add_mesh_from_geometry(
+                    element, vertices, faces, f"Model/{ifc_type}", config_color
+                )
+                processed_count += 1
+        except Exception as e:
+            if verbose:
+                print(f"⚠️ Could not tessellate {shape.guid}: {e}")
+        if not iterator.next():
+            break
+
+    visualizer.flush_traces()
+    return processed_count
+
+
+def _process_model(ifc_source, color_config_path=None, verbose=False):
+    """
+    Load an IFC model and build the populated 3D visualizer.
+
+    Pure compute path shared by all viewer entry points: no UI construction
+    and no notebook imports, so batch callers and tests can use it directly.
+
+    Parameters:
+    -----------
+    ifc_source : str
+        Path to IFC file (local path or URL)
+    color_config_path : str, optional
+        Path to YAML color configuration file
+    verbose : bool, default=False
+        Whether to print detailed processing information
+
+    Returns:
+    --------
+    tuple
+        (visualizer, hierarchy, model), or None if no element carries a
+        Custom_Mesh property
+    """
+    # Determine color config path
+    if color_config_path is None:
+        # Use default config from package (colab_viewer/configs/)
+        package_dir = Path(__file__).parent
+        color_config_path = package_dir / "configs" / "default_colors.yaml"
+        if not color_config_path.exists():
+            # Fallback to main configs folder
+            color_config_path = package_dir.parent / "configs" / "abstractBIM_plots_config.yaml"
+            if not color_config_path.exists():
+                color_config_path = None
+
+    if verbose:
+        print(f"🚀 Starting IFC file processing...")
+        print(f"📂 Source: {ifc_source}")
+        if color_config_path:
+            print(f"🎨 Color config: {color_config_path}")
+        print("-" * 80)
+
+    # Load IFC model
+    model = IFCDownloader.download_and_load(ifc_source)
+
+    # Build hierarchy
+    hierarchy_builder = HierarchicalStructure(model)
+    hierarchy = hierarchy_builder.get_hierarchy()
+
+    # Initialize geometry extractor with colors
+    geometry_extractor = GeometryExtractor(color_config_path)
+
+    # Initialize visualizer
+    visualizer = Visualizer3D(geometry_extractor)
+
+    if verbose:
+        print("\n🔍 Extracting and processing geometry and QTO properties...")
+
+    # Build the wall -> coverings index once instead of scanning
+    # IfcRelCoversBldgElements per wall inside the loop
+    covering_index = GeometryExtractor.build_covering_index(model)
+
+    # Invert IfcRelDefinesByProperties once so mesh/QTO extraction per
+    # element is a dict lookup instead of an IsDefinedBy walk
+    definitions_index = GeometryExtractor.build_definitions_index(model)
+
+    # Flatten the hierarchy so extraction can run in parallel; each
+    # element's mesh/QTO extraction is independent and ifcopenshell
+    # releases the GIL in its C calls
+    work_items = [
+        (element, storey_name, ifc_type)
+        for storey_name, types in hierarchy.items()
+        for ifc_type, elements in types.items()
+        for element in elements
+    ]
+    total_elements = len(work_items)
+
+    def _extract_one(item):
+        element, storey_name, ifc_type = item
+        mesh_json, qto_props = GeometryExtractor.extract_mesh_and_qto(
+            element, model, covering_index, definitions_index
+        )
+        return element, storey_name, ifc_type, mesh_json, qto_props
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = list(executor.map(_extract_one, work_items))
+
+    # Figure mutation is not thread-safe, so meshes are added serially.
+    # Skipped elements are only counted per type: formatting and printing a
+    # message per element (plus the GlobalId/is_a() C calls it needs)
+    # dominates wall time on large models under verbose=True.
+    processed_count = 0
+    skipped_by_type = defaultdict(int)
+    # Reuse one string object per (storey, type) pair: only dozens of unique
+    # paths exist, and shared references let downstream dict probes by
+    # hierarchy_path take the identity fast path
+    path_cache = {}
+    for element, storey_name, ifc_type, mesh_json, qto_props in results:
+        if mesh_json:
+            config_color = geometry_extractor.get_color_for_type(ifc_type)
+            hierarchy_path = path_cache.setdefault((storey_name, ifc_type), f"{storey_name}/{ifc_type}")
+            visualizer.add_mesh_from_element(element, mesh_json, hierarchy_path, qto_props, config_color)
+            processed_count += 1
+        else:
+            skipped_by_type[ifc_type] += 1
+
+    # One add_traces call pushes every queued mesh to the figure at once
+    visualizer.flush_traces()
+
+    if verbose and skipped_by_type:
+        print("⚠️ Elements without Custom_Mesh:")
+        for ifc_type, count in sorted(skipped_by_type.items()):
+            print(f"   {ifc_type}: {count}")
+
+    if processed_count == 0:
+        # No Custom_Mesh properties: fall back to real geometry via the
+        # multicore ifcopenshell iterator instead of bailing out
+        if verbose:
+            print("🔁 No Custom_Mesh found, falling back to the geometry iterator...")
+        processed_count = _process_with_geom_iterator(model, visualizer, geometry_extractor, verbose)
+
+    if processed_count == 0:
+        print("⚠️ No elements with Custom_Mesh properties found.")
+        print("🔍 Check that the IFC file contains Pset_CustomGeometry properties with Custom_Mesh")
+        return None
+
+    if verbose:
+        print(f"📊 Total elements in structure: {total_elements}")
+        print(f"📊 Elements processed with geometry: {processed_count}")
+        print(f"✅ {processed_count} elements with geometry processed!")
+
+    visualizer.configure_layout()
+
+    return visualizer, hierarchy, model
+
+
+def visualize_ifc(
+    ifc_source,
+    color_config_path=None,
+    show_ui=True,
+    verbose=False
+):
+    """
+    Visualize an IFC model in 3D with optional color configuration.
+
+    This is the main entry point for the IFC viewer. It handles loading,
+    processing, and displaying IFC models with minimal code required.
+
+    Parameters:
+    -----------
+    ifc_source : str
+        Path to IFC file (local path or URL)
+    color_config_path : str, optional
+        Path to YAML color configuration file
+        Default: uses built-in abstractBIM_plots_config.yaml
+    show_ui : bool, default=True
+        Whether to show the interactive UI (filters, table, properties)
+        If False, only shows the 3D viewer
+    verbose : bool, default=False
+        Whether to print detailed processing information
+
+    Returns:
+    --------
+    tuple
+        (visualizer, hierarchy, ui) if show_ui=True
+        (visualizer, hierarchy) if show_ui=False
+
+    Example:
+    --------
+    ```python
+    # Simple usage with URL
+    from qto_buccaneer import visualize_ifc
+
+    url = "https://example.com/model.ifc"
+    visualize_ifc(url)
+
+    # With custom color config
+    visualize_ifc(
+        "path/to/model.ifc",
+        color_config_path="path/to/colors.yaml"
+    )
+
+    # Just 3D view, no UI
+    viz, hier = visualize_ifc(
+        "model.ifc",
+        show_ui=False
+    )
+    ```
+    """
+    try:
+        processed = _process_model(ifc_source, color_config_path, verbose)
+        if processed is None:
+            return None
+        visualizer, hierarchy, model = processed
+
+        if show_ui:
+            # Import UI module only if needed (requires ipywidgets)
+            try:
+                from .ifc_viewer_ui import HierarchicalTableUI
+                ui = HierarchicalTableUI(hierarchy, visualizer, model)
+                ui_widget = ui.create_ui()
+
+                if verbose:
+                    print("\n✅ Full visualization! Use the table for selection and the panel for visibility.")
+
+                # Return the widget directly - Jupyter will display it automatically
+                return ui_widget
+            except ImportError as e:
+                print(f"⚠️ ipywidgets not available. Showing 3D view only.")
+                if verbose:
+                    print(f"   Error: {e}")
+                    print("   Install with: !pip install ipywidgets")
+                from IPython.display import display
+                display(visualizer.fig)
+                return visualizer, hierarchy
+            except Exception as e:
+                print(f"⚠️ Error loading UI. Showing 3D view only.")
+                if verbose:
+                    print(f"   Error: {e}")
+                    import traceback
+                    print(traceback.format_exc())
+                from IPython.display import display
+                display(visualizer.fig)
+                return visualizer, hierarchy
+        else:
+            # Just show the 3D figure
+            from IPython.display import display
+            display(visualizer.fig)
+            return visualizer, hierarchy
+
+    except Exception as e:
+        print(f"❌ General error: {e}")
+        if verbose:
+            print(traceback.format_exc())
+        return None
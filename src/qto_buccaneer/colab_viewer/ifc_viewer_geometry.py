@@ -1,162 +1,389 @@
-"""
-Geometry Extraction Module for qto_buccaneer Viewer
-Handles extraction of Custom_Mesh geometry and QTO properties from IFC elements.
-"""
-
-import json
-import numpy as np
-from scipy.spatial.transform import Rotation
-import yaml
-from pathlib import Path
-
-
-class GeometryExtractor:
-    """Extracts geometry from Custom_Mesh properties and QTO properties."""
-    
-    def __init__(self, color_config_path=None):
-        """
-        Initialize GeometryExtractor with optional color configuration.
-        
-        Parameters:
-        -----------
-        color_config_path : str, optional
-            Path to YAML file containing color mappings for IFC types
-        """
-        self.color_map = self._load_color_config(color_config_path) if color_config_path else {}
-    
-    def _load_color_config(self, config_path):
-        """Load color mappings from YAML configuration file."""
-        try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
-            color_map = {}
-            plots = config.get('plots', {})
-            
-            for plot_name, plot_config in plots.items():
-                elements = plot_config.get('elements', [])
-                for element in elements:
-                    element_filter = element.get('filter', '')
-                    color = element.get('color')
-                    
-                    # Extract IFC type from filter (e.g., "type=IfcWall" -> "IfcWall")
-                    if 'type=' in element_filter and color:
-                        ifc_type = element_filter.split('type=')[1].split(' ')[0]
-                        color_map[ifc_type] = color
-            
-            return color_map
-        except Exception as e:
-            print(f"⚠️ Could not load color config: {e}")
-            return {}
-    
-    def get_color_for_element(self, element):
-        """
-        Get color for an IFC element based on its type.
-        
-        Parameters:
-        -----------
-        element : IFC element
-            The IFC element to get color for
-            
-        Returns:
-        --------
-        str or None
-            Hex color code or None if no mapping exists
-        """
-        ifc_type = element.is_a()
-        return self.color_map.get(ifc_type)
-    
-    @staticmethod
-    def extract_custom_mesh_from_entity(entity):
-        """Extract Custom_Mesh property from an IFC entity."""
-        if not hasattr(entity, 'IsDefinedBy'):
-            return None
-        for rel in entity.IsDefinedBy:
-            if rel.is_a("IfcRelDefinesByProperties"):
-                pset = rel.RelatingPropertyDefinition
-                if hasattr(pset, 'Name') and pset.Name == "Pset_CustomGeometry":
-                    if hasattr(pset, 'HasProperties'):
-                        for prop in pset.HasProperties:
-                            if hasattr(prop, 'Name') and prop.Name == "Custom_Mesh":
-                                if hasattr(prop, 'NominalValue') and prop.NominalValue:
-                                    return prop.NominalValue.wrappedValue
-        return None
-
-    @staticmethod
-    def extract_qto_properties(entity, model):
-        """Extracts all QTO properties from IfcElementQuantity sets."""
-        qto_props = {}
-        
-        # Check if the element has geometry
-        if not GeometryExtractor.extract_custom_mesh_from_entity(entity):
-            return qto_props
-
-        # Extract QTO properties of the main element
-        if hasattr(entity, 'IsDefinedBy'):
-            for rel in entity.IsDefinedBy:
-                if rel.is_a("IfcRelDefinesByProperties"):
-                    pset = rel.RelatingPropertyDefinition
-                    if pset.is_a("IfcElementQuantity") and hasattr(pset, 'Name') and pset.Name.startswith("Qto_"):
-                        if hasattr(pset, 'Quantities'):
-                            for qty in pset.Quantities:
-                                qty_name = getattr(qty, 'Name', 'Unknown')
-                                qty_value = None
-                                
-                                if qty.is_a('IfcQuantityLength'):
-                                    qty_value = getattr(qty, 'LengthValue', None)
-                                elif qty.is_a('IfcQuantityArea'):
-                                    qty_value = getattr(qty, 'AreaValue', None)
-                                elif qty.is_a('IfcQuantityVolume'):
-                                    qty_value = getattr(qty, 'VolumeValue', None)
-                                elif qty.is_a('IfcQuantityCount'):
-                                    qty_value = getattr(qty, 'CountValue', None)
-                                elif qty.is_a('IfcQuantityWeight'):
-                                    qty_value = getattr(qty, 'WeightValue', None)
-
-                                if qty_value is not None:
-                                    qto_props[qty_name] = qty_value
-
-        # Check associated elements (e.g. IfcCovering for IfcWall)
-        if entity.is_a("IfcWall") or entity.is_a("IfcWallStandardCase"):
-            for rel in model.by_type("IfcRelCoversBldgElements"):
-                if rel.RelatingBuildingElement == entity and rel.RelatedCoverings:
-                    for covering in rel.RelatedCoverings:
-                        if GeometryExtractor.extract_custom_mesh_from_entity(covering):
-                            if hasattr(covering, 'IsDefinedBy'):
-                                for rel_cov in covering.IsDefinedBy:
-                                    if rel_cov.is_a("IfcRelDefinesByProperties"):
-                                        pset = rel_cov.RelatingPropertyDefinition
-                                        if pset.is_a("IfcElementQuantity") and hasattr(pset, 'Name') and pset.Name.startswith("Qto_"):
-                                            if hasattr(pset, 'Quantities'):
-                                                for qty in pset.Quantities:
-                                                    qty_name = getattr(qty, 'Name', 'Unknown')
-                                                    qty_value = None
-                                                    
-                                                    if qty.is_a('IfcQuantityLength'):
-                                                        qty_value = getattr(qty, 'LengthValue', None)
-                                                    elif qty.is_a('IfcQuantityArea'):
-                                                        qty_value = getattr(qty, 'AreaValue', None)
-                                                    elif qty.is_a('IfcQuantityVolume'):
-                                                        qty_value = getattr(qty, 'VolumeValue', None)
-                                                    elif qty.is_a('IfcQuantityCount'):
-                                                        qty_value = getattr(qty, 'CountValue', None)
-                                                    elif qty.is_a('IfcQuantityWeight'):
-                                                        qty_value = getattr(qty, 'WeightValue', None)
-                                                    
-                                                    if qty_value is not None:
-                                                        qto_props[f"{qty_name}_Covering"] = qty_value
-
-        return qto_props
-
-    @staticmethod
-    def transform_coordinates(vertices, rotation, translation):
-        """Transform mesh coordinates using rotation and translation."""
-        vertices = np.array(vertices, dtype=np.float32).reshape(-1, 3)
-        if rotation and any(rotation.values()):
-            quat = [rotation["qw"], rotation["qx"], rotation["qy"], rotation["qz"]]
-            rot = Rotation.from_quat(quat)
-            vertices = rot.apply(vertices)
-        vertices = vertices[:, [0, 2, 1]]
-        position = [translation["x"], translation["z"], translation["y"]]
-        vertices += position
-        return vertices
+"""
+Geometry Extraction Module for qto_buccaneer Viewer
+Handles extraction of Custom_Mesh geometry and QTO properties from IFC elements.
+"""
+
+import functools
+import json
+import math
+import os
+import sys
+import numpy as np
+import yaml
+from pathlib import Path
+
+
+def _quat_to_matrix(x, y, z, w):
+    """
+    Build a 3x3 rotation matrix from quaternion components.
+
+    Equivalent to scipy's Rotation.from_quat([x, y, z, w]).as_matrix() but
+    without the per-call validation and allocation overhead, which dominates
+    for the small vertex counts typical of one IFC element.
+    """
+    norm = math.sqrt(x * x + y * y + z * z + w * w)
+    if norm > 0:
+        x, y, z, w = x / norm, y / norm, z / norm, w / norm
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+    return np.array([
+        [1 - 2 * (yy + zz), 2 * (xy - wz), 2 * (xz + wy)],
+        [2 * (xy + wz), 1 - 2 * (xx + zz), 2 * (yz - wx)],
+        [2 * (xz - wy), 2 * (yz + wx), 1 - 2 * (xx + yy)],
+    ], dtype=np.float32)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_yaml_cached(config_path, mtime):
+    """Parse a YAML config once per (path, mtime); notebook re-runs hit the cache."""
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+@functools.lru_cache(maxsize=16)
+def _load_json_cached(config_path, mtime):
+    """Parse a JSON config once per (path, mtime)."""
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+# Quantity type -> value attribute, so extraction does one is_a() call and a
+# dict probe instead of walking a 5-way is_a() ladder per quantity
+_QTY_ATTR = {
+    'IfcQuantityLength': 'LengthValue',
+    'IfcQuantityArea': 'AreaValue',
+    'IfcQuantityVolume': 'VolumeValue',
+    'IfcQuantityCount': 'CountValue',
+    'IfcQuantityWeight': 'WeightValue',
+}
+
+
+class GeometryExtractor:
+    """Extracts geometry from Custom_Mesh properties and QTO properties."""
+    
+    def __init__(self, color_config_path=None):
+        """
+        Initialize GeometryExtractor with optional color configuration.
+        
+        Parameters:
+        -----------
+        color_config_path : str, optional
+            Path to YAML file containing color mappings for IFC types
+        """
+        self.color_map = self._load_color_config(color_config_path) if color_config_path else {}
+    
+    def _load_color_config(self, config_path):
+        """Load color mappings from YAML configuration file."""
+        try:
+            # Prefer a pre-converted JSON sidecar (see scripts/yaml_to_json.py):
+            # JSON parses an order of magnitude faster than YAML
+            json_path = Path(config_path).with_suffix('.json')
+            if json_path.exists():
+                config = _load_json_cached(str(json_path), os.path.getmtime(json_path))
+            else:
+                config = _load_yaml_cached(str(config_path), os.path.getmtime(config_path))
+
+            color_map = {}
+            plots = config.get('plots', {})
+            
+            for plot_name, plot_config in plots.items():
+                elements = plot_config.get('elements', [])
+                for element in elements:
+                    element_filter = element.get('filter', '')
+                    color = element.get('color')
+                    
+                    # Extract IFC type from filter (e.g., "type=IfcWall" -> "IfcWall")
+                    if 'type=' in element_filter and color:
+                        ifc_type = element_filter.split('type=')[1].split(' ')[0]
+                        # Intern keys so lookups with is_a() strings hit the
+                        # pointer-equality fast path in the dict probe
+                        color_map[sys.intern(ifc_type)] = color
+            
+            return color_map
+        except Exception as e:
+            print(f"⚠️ Could not load color config: {e}")
+            return {}
+    
+    def get_color_for_element(self, element):
+        """
+        Get color for an IFC element based on its type.
+        
+        Parameters:
+        -----------
+        element : IFC element
+            The IFC element to get color for
+            
+        Returns:
+        --------
+        str or None
+            Hex color code or None if no mapping exists
+        """
+        return self.color_map.get(element.is_a())
+
+    def get_color_for_type(self, ifc_type):
+        """
+        Get color for an already-resolved IFC type name.
+
+        Avoids the per-element is_a() call when the caller iterates the
+        hierarchy, which already keys elements by type.
+
+        Parameters:
+        -----------
+        ifc_type : str
+            IFC type name (e.g., "IfcWall")
+
+        Returns:
+        --------
+        str or None
+            Hex color code or None if no mapping exists
+        """
+        return self.color_map.get(ifc_type)
+    
+    @staticmethod
+    def extract_custom_mesh_from_entity(entity):
+        """Extract Custom_Mesh property from an IFC entity."""
+        # Each hasattr/attribute access crosses the ifcopenshell C boundary,
+        # so keep the dispatch count minimal and bail out as soon as the
+        # Pset_CustomGeometry set has been inspected.
+        for rel in getattr(entity, 'IsDefinedBy', None) or ():
+            if rel.is_a("IfcRelDefinesByProperties"):
+                pset = rel.RelatingPropertyDefinition
+                if getattr(pset, 'Name', None) == "Pset_CustomGeometry":
+                    for prop in getattr(pset, 'HasProperties', None) or ():
+                        if getattr(prop, 'Name', None) == "Custom_Mesh":
+                            value = getattr(prop, 'NominalValue', None)
+                            return value.wrappedValue if value else None
+                    return None
+        return None
+
+    @staticmethod
+    def _extract_quantities(pset, qto_props, suffix=''):
+        """Collect quantity values from a Qto_ IfcElementQuantity into qto_props."""
+        for qty in getattr(pset, 'Quantities', None) or ():
+            attr = _QTY_ATTR.get(qty.is_a())
+            if attr is None:
+                continue
+            qty_value = getattr(qty, attr, None)
+            if qty_value is not None:
+                qty_name = getattr(qty, 'Name', 'Unknown')
+                qto_props[f"{qty_name}{suffix}"] = qty_value
+
+    @staticmethod
+    def build_covering_index(model):
+        """
+        Build a wall -> coverings index from IfcRelCoversBldgElements.
+
+        Scanning model.by_type("IfcRelCoversBldgElements") per wall is
+        O(walls x relations); building this dict once makes each lookup O(1).
+        Coverings without a Custom_Mesh are filtered out here so consumers
+        do not re-walk their IsDefinedBy relations per wall lookup.
+
+        Returns:
+        --------
+        dict
+            Mapping of RelatingBuildingElement.id() to list of coverings
+            that carry a Custom_Mesh
+        """
+        covering_index = {}
+        # A covering referenced by several relations is only probed for a
+        # Custom_Mesh once
+        has_mesh = {}
+
+        def _cached_has_mesh(covering):
+            cov_id = covering.id()
+            result = has_mesh.get(cov_id)
+            if result is None:
+                result = bool(GeometryExtractor.extract_custom_mesh_from_entity(covering))
+                has_mesh[cov_id] = result
+            return result
+
+        for rel in model.by_type("IfcRelCoversBldgElements"):
+            if rel.RelatingBuildingElement and rel.RelatedCoverings:
+                coverings = [
+                    covering for covering in rel.RelatedCoverings
+                    if _cached_has_mesh(covering)
+                ]
+                if coverings:
+                    covering_index.setdefault(rel.RelatingBuildingElement.id(), []).extend(coverings)
+        return covering_index
+
+    @staticmethod
+    def build_definitions_index(model):
+        """
+        Build element id -> {'mesh': ..., 'qtos': [...]} from property relations.
+
+        One pass over model.by_type("IfcRelDefinesByProperties") replaces the
+        per-element IsDefinedBy walks: each element's Custom_Mesh string and
+        Qto_ quantity sets become a single dict lookup.
+
+        Returns:
+        --------
+        dict
+            Mapping of element id to {'mesh': str or None, 'qtos': list of
+            IfcElementQuantity psets}
+        """
+        definitions_index = {}
+        for rel in model.by_type("IfcRelDefinesByProperties"):
+            pset = rel.RelatingPropertyDefinition
+            pset_name = getattr(pset, 'Name', None)
+
+            mesh_json = None
+            is_qto = False
+            if pset_name == "Pset_CustomGeometry":
+                for prop in getattr(pset, 'HasProperties', None) or ():
+                    if getattr(prop, 'Name', None) == "Custom_Mesh":
+                        value = getattr(prop, 'NominalValue', None)
+                        if value:
+                            mesh_json = value.wrappedValue
+                        break
+            elif pset_name and pset_name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                is_qto = True
+            else:
+                continue
+
+            for obj in rel.RelatedObjects or ():
+                entry = definitions_index.setdefault(obj.id(), {'mesh': None, 'qtos': []})
+                if mesh_json is not None:
+                    entry['mesh'] = mesh_json
+                if is_qto:
+                    entry['qtos'].append(pset)
+        return definitions_index
+
+    @staticmethod
+    def extract_mesh_and_qto(entity, model, covering_index=None, definitions_index=None):
+        """
+        Extract Custom_Mesh and QTO properties in a single IsDefinedBy traversal.
+
+        Walking entity.IsDefinedBy is the hot path for large models, so this
+        fuses extract_custom_mesh_from_entity and extract_qto_properties into
+        one pass instead of re-walking the relations twice per element. With a
+        definitions_index (see build_definitions_index) even that single walk
+        collapses into a dict lookup.
+
+        Returns:
+        --------
+        tuple
+            (mesh_json or None, qto_props dict). qto_props is empty when the
+            element has no Custom_Mesh.
+        """
+        qto_props = {}
+
+        if definitions_index is not None:
+            entry = definitions_index.get(entity.id())
+            mesh_json = entry['mesh'] if entry else None
+            if mesh_json is None:
+                return None, {}
+            for pset in entry['qtos']:
+                GeometryExtractor._extract_quantities(pset, qto_props)
+        else:
+            mesh_json = None
+            for rel in getattr(entity, 'IsDefinedBy', None) or ():
+                if not rel.is_a("IfcRelDefinesByProperties"):
+                    continue
+                pset = rel.RelatingPropertyDefinition
+                pset_name = getattr(pset, 'Name', None)
+
+                if pset_name == "Pset_CustomGeometry":
+                    for prop in getattr(pset, 'HasProperties', None) or ():
+                        if getattr(prop, 'Name', None) == "Custom_Mesh":
+                            value = getattr(prop, 'NominalValue', None)
+                            if value:
+                                mesh_json = value.wrappedValue
+
+                elif pset_name and pset_name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                    GeometryExtractor._extract_quantities(pset, qto_props)
+
+            if mesh_json is None:
+                return None, {}
+
+        # Check associated elements (e.g. IfcCovering for IfcWall)
+        if entity.is_a("IfcWall") or entity.is_a("IfcWallStandardCase"):
+            if covering_index is None:
+                covering_index = GeometryExtractor.build_covering_index(model)
+            for covering in covering_index.get(entity.id(), []):
+                if definitions_index is not None:
+                    cov_entry = definitions_index.get(covering.id())
+                    for pset in (cov_entry['qtos'] if cov_entry else ()):
+                        GeometryExtractor._extract_quantities(pset, qto_props, suffix="_Covering")
+                else:
+                    for rel_cov in getattr(covering, 'IsDefinedBy', None) or ():
+                        if rel_cov.is_a("IfcRelDefinesByProperties"):
+                            pset = rel_cov.RelatingPropertyDefinition
+                            pset_name = getattr(pset, 'Name', None)
+                            if pset_name and pset_name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                                GeometryExtractor._extract_quantities(pset, qto_props, suffix="_Covering")
+
+        return mesh_json, qto_props
+
+    @staticmethod
+    def extract_qto_properties(entity, model, covering_index=None):
+        """
+        Extracts all QTO properties from IfcElementQuantity sets.
+
+        Callers are expected to have already checked the element for a
+        Custom_Mesh; the previous redundant guard re-walked IsDefinedBy
+        for every element.
+        """
+        qto_props = {}
+
+        # Extract QTO properties of the main element
+        for rel in getattr(entity, 'IsDefinedBy', None) or ():
+            if rel.is_a("IfcRelDefinesByProperties"):
+                pset = rel.RelatingPropertyDefinition
+                pset_name = getattr(pset, 'Name', None)
+                if pset_name and pset_name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                    GeometryExtractor._extract_quantities(pset, qto_props)
+
+        # Check associated elements (e.g. IfcCovering for IfcWall)
+        if entity.is_a("IfcWall") or entity.is_a("IfcWallStandardCase"):
+            if covering_index is None:
+                covering_index = GeometryExtractor.build_covering_index(model)
+            for covering in covering_index.get(entity.id(), []):
+                for rel_cov in getattr(covering, 'IsDefinedBy', None) or ():
+                    if rel_cov.is_a("IfcRelDefinesByProperties"):
+                        pset = rel_cov.RelatingPropertyDefinition
+                        pset_name = getattr(pset, 'Name', None)
+                        if pset_name and pset_name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                            GeometryExtractor._extract_quantities(pset, qto_props, suffix="_Covering")
+
+        return qto_props
+
+    @staticmethod
+    def transform_coordinates(vertices, rotation, translation, out=None):
+        """
+        Transform mesh coordinates using rotation and translation.
+
+        Parameters:
+        -----------
+        vertices : array-like
+            Flat or (N, 3) vertex coordinates
+        rotation : dict
+            Quaternion components (qw, qx, qy, qz)
+        translation : dict
+            Translation components (x, y, z)
+        out : np.ndarray, optional
+            Preallocated (>=N, 3) float32 buffer reused across calls to
+            avoid per-element allocation churn
+
+        Returns:
+        --------
+        np.ndarray
+            Transformed (N, 3) float32 vertices (a view into out when given)
+        """
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        n = vertices.shape[0]
+        if out is not None and out.shape[0] >= n:
+            dest = out[:n]
+        else:
+            dest = np.empty_like(vertices)
+        if rotation and any(rotation.values()):
+            quat = [rotation["qw"], rotation["qx"], rotation["qy"], rotation["qz"]]
+            # Fold the Y/Z axis swap into the rotation matrix so the vertices
+            # go through a single matmul instead of rotate + fancy-index copy
+            matrix = _quat_to_matrix(*quat)[[0, 2, 1], :]
+            np.matmul(vertices, matrix.T, out=dest)
+        else:
+            dest[:] = vertices[:, [0, 2, 1]]
+        position = np.array([translation["x"], translation["z"], translation["y"]], dtype=np.float32)
+        np.add(dest, position, out=dest)
+        return dest
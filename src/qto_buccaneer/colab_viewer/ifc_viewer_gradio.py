@@ -3,20 +3,37 @@ Gradio-based IFC Viewer for Google Colab
 More robust alternative to ipywidgets that works reliably in Colab.
 """
 
+import asyncio
 import gradio as gr
+import numpy as np
+import os
 import plotly.graph_objects as go
 import pandas as pd
 import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    # Optional: reorders triangle indices for GPU vertex-cache locality
+    import meshoptimizer
+except ImportError:
+    meshoptimizer = None
+
+# Derived-data cache shared across sessions, keyed by IFC content hash
+_CACHE_DIR = Path.home() / ".cache" / "qto_buccaneer"
+
+# Reordering has its own cost; skip it for small meshes
+_VERTEX_CACHE_MIN_FACES = 10000
 
 
 class GradioIFCViewer:
     """Robust IFC Viewer using Gradio for Google Colab."""
     
-    def __init__(self, model, hierarchy, geometry_extractor):
+    def __init__(self, model, hierarchy, geometry_extractor, cache_key=None):
         """
         Initialize the Gradio IFC Viewer.
-        
+
         Parameters:
         -----------
         model : ifcopenshell model
@@ -25,99 +42,384 @@ class GradioIFCViewer:
             Hierarchical structure {storey: {ifc_type: [elements]}}
         geometry_extractor : GeometryExtractor
             Instance for extracting geometry and colors
+        cache_key : str, optional
+            Content hash of the IFC file (see IFCDownloader.file_hash).
+            When given, extracted element data is persisted under
+            ~/.cache/qto_buccaneer/ and reused on the next run
         """
         self.model = model
         self.hierarchy = hierarchy
         self.geometry_extractor = geometry_extractor
+        self._cache_key = cache_key
         
         # Build element data
         self.elements_data = []
         self.element_lookup = {}
         self.mesh_data = {}
         self.original_colors = {}
-        self.properties_data = {}
-        
+        self._mesh_json = {}
+        self._props_cache = {}
+
+        # Invert IfcRelDefinesByProperties once: GlobalId -> [psets].
+        # Property-panel lookups become a dict hit instead of rescanning
+        # element.IsDefinedBy on every click
+        self._psets_by_element = defaultdict(list)
+        for rel in model.by_type("IfcRelDefinesByProperties"):
+            pset = rel.RelatingPropertyDefinition
+            for obj in rel.RelatedObjects or ():
+                self._psets_by_element[obj.GlobalId].append(pset)
+
         self._build_element_data()
-        
+
+        # Figure is built lazily on first access; selection then rewrites
+        # a vertex-color range instead of rebuilding the Mesh3d payload
+        self._base_fig_cache = None
+        self._vertex_ranges = {}
+        self._face_ranges = {}
+        self._merged_verts = None
+        self._merged_faces = None
+        self._merged_faces_opt = None
+        self._vertexcolor = None
+        self._hovertext = None
+        self._selected = None
+
+    @property
+    def _base_fig(self):
+        """The cached base figure, built on first access."""
+        if self._base_fig_cache is None:
+            self._base_fig_cache = self.create_3d_figure()
+        return self._base_fig_cache
+
+    def update_selection(self, selected_element=None):
+        """Return the cached figure with only the selection highlight updated."""
+        fig = self._base_fig
+        prev = self._selected
+        if prev is not None and prev in self._vertex_ranges:
+            start, count = self._vertex_ranges[prev]
+            self._vertexcolor[start:start + count] = self._get_color(prev)
+        self._selected = None
+        if selected_element and selected_element in self._vertex_ranges:
+            start, count = self._vertex_ranges[selected_element]
+            self._vertexcolor[start:start + count] = "yellow"
+            self._selected = selected_element
+        if len(fig.data):
+            fig.data[0].vertexcolor = self._vertexcolor
+        return fig
+
+    def _get_mesh(self, full_name):
+        """Decode an element's mesh on first access, caching the ndarray form."""
+        mesh = self.mesh_data.get(full_name)
+        if mesh is None:
+            mesh_json = self._mesh_json.get(full_name)
+            if mesh_json is None:
+                return None
+            try:
+                mesh = json.loads(mesh_json) if isinstance(mesh_json, str) else mesh_json
+                vertices = np.asarray(mesh.get('vertices', []), dtype=np.float32).reshape(-1, 3)
+                faces = np.asarray(mesh.get('faces', []), dtype=np.int32).reshape(-1, 3)
+                # Drop degenerate (zero-area) triangles: they cost JSON
+                # bytes and WebGL work but never appear on screen.
+                # Vertices stay put, so vertex ranges are unaffected
+                if len(faces) and len(vertices):
+                    v0 = vertices[faces[:, 0]]
+                    v1 = vertices[faces[:, 1]]
+                    v2 = vertices[faces[:, 2]]
+                    area_mask = np.linalg.norm(np.cross(v1 - v0, v2 - v0), axis=1) > 1e-10
+                    if not area_mask.all():
+                        faces = faces[area_mask]
+                # Snap coordinates to the FP16 grid and round: decimeter
+                # precision is plenty for BIM coords, and the rounded
+                # values serialize to far fewer JSON bytes over the
+                # Gradio websocket
+                vertices = np.round(vertices.astype(np.float16).astype(np.float32), 3)
+                mesh['vertices'] = vertices
+                mesh['faces'] = faces
+            except Exception:
+                mesh = None
+            self.mesh_data[full_name] = mesh
+        return mesh
+
+    def _get_color(self, full_name):
+        """Resolve an element's display color on first access."""
+        color = self.original_colors.get(full_name)
+        if color is None:
+            element = self.element_lookup.get(full_name)
+            color = (element is not None and self.geometry_extractor.get_color_for_element(element)) or "#cccccc"
+            self.original_colors[full_name] = color
+        return color
+
+    def _cache_path(self):
+        """Path of this model's derived-data cache file, or None."""
+        if not self._cache_key:
+            return None
+        return _CACHE_DIR / f"{self._cache_key}.json"
+
+    def _load_cached_data(self):
+        """Populate table rows and mesh JSON from the on-disk cache."""
+        cache_path = self._cache_path()
+        if cache_path is None or not cache_path.exists():
+            return False
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            # Validate into locals first; committing row by row would
+            # leave partial state behind on a bad entry, and the full
+            # extraction fallback would then duplicate every row
+            rows = cached['rows']
+            mesh_json = cached['mesh_json']
+            lookup = {
+                row['FullName']: self.model.by_guid(row['GUID'])
+                for row in rows
+            }
+            self.element_lookup.update(lookup)
+            self.elements_data.extend(rows)
+            self._mesh_json.update(mesh_json)
+            return True
+        except Exception:
+            # Stale or corrupt cache: fall back to a full extraction
+            return False
+
+    def _write_cache(self):
+        """Persist extracted rows and mesh JSON for the next session."""
+        cache_path = self._cache_path()
+        if cache_path is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'rows': self.elements_data, 'mesh_json': self._mesh_json}, f)
+        except Exception:
+            pass
+
     def _build_element_data(self):
         """Build element data for the table and 3D view."""
-        for storey_name, types in self.hierarchy.items():
-            for ifc_type, elements in types.items():
-                for element in elements:
-                    mesh_json = self.geometry_extractor.extract_custom_mesh_from_entity(element)
-                    if mesh_json:
-                        element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
-                        full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                        
-                        # Store element reference
-                        self.element_lookup[full_name] = element
-                        
-                        # Parse mesh
-                        try:
-                            mesh = json.loads(mesh_json) if isinstance(mesh_json, str) else mesh_json
-                            self.mesh_data[full_name] = mesh
-                        except:
-                            continue
-                        
-                        # Get color
-                        color = self.geometry_extractor.get_color_for_element(element) or "#cccccc"
-                        self.original_colors[full_name] = color
-                        
-                        # Extract QTO properties
-                        qto_props = self.geometry_extractor.extract_qto_properties(element, self.model)
-                        self.properties_data[full_name] = qto_props
-                        
-                        # Build table row
-                        self.elements_data.append({
-                            'Storey': storey_name,
-                            'Type': ifc_type,
-                            'Name': element_name,
-                            'FullName': full_name,
-                            'GUID': element.GlobalId,
-                            **{k: f"{v:.2f}" if isinstance(v, float) else str(v) 
-                               for k, v in list(qto_props.items())[:5]}
-                        })
-    
-    def create_3d_figure(self, selected_element=None, visible_elements=None):
-        """Create the 3D Plotly figure."""
-        fig = go.Figure()
-        
-        for full_name, mesh in self.mesh_data.items():
-            if visible_elements and full_name not in visible_elements:
+        if self._load_cached_data():
+            self._finalize_element_data()
+            return
+
+        # The per-element Custom_Mesh probes are independent and spend
+        # their time in ifcopenshell C calls that release the GIL, so
+        # they run in a thread pool; the dicts are populated serially
+        # afterwards since insertion is not thread-safe
+        tasks = [
+            (storey_name, ifc_type, element)
+            for storey_name, types in self.hierarchy.items()
+            for ifc_type, elements in types.items()
+            for element in elements
+        ]
+
+        def _extract_one(task):
+            return task + (self.geometry_extractor.extract_custom_mesh_from_entity(task[2]),)
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(_extract_one, tasks))
+
+        for storey_name, ifc_type, element, mesh_json in results:
+            if mesh_json:
+                element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
+                full_name = f"{storey_name}/{ifc_type}/{element_name}"
+
+                # Store element reference
+                self.element_lookup[full_name] = element
+
+                # Keep the raw JSON string; decoding and color lookup
+                # are deferred to first access (_get_mesh / _get_color)
+                # so startup only pays for the table rows
+                self._mesh_json[full_name] = mesh_json
+
+                # Build table row
+                self.elements_data.append({
+                    'Storey': storey_name,
+                    'Type': ifc_type,
+                    'Name': element_name,
+                    'FullName': full_name,
+                    'GUID': element.GlobalId
+                })
+
+        self._write_cache()
+        self._finalize_element_data()
+
+    def _finalize_element_data(self):
+        """Build the session DataFrame and filter indices from the rows."""
+        # One DataFrame for the whole session; dropdown filters select
+        # precomputed index groups instead of rebuilding the frame
+        self._elements_df = pd.DataFrame(self.elements_data)
+        if not self._elements_df.empty:
+            # Categorical codes replace repeated Python strings, so
+            # filter comparisons and groupby run on small integers
+            self._elements_df['Storey'] = self._elements_df['Storey'].astype('category')
+            self._elements_df['Type'] = self._elements_df['Type'].astype('category')
+            self._storey_groups = self._elements_df.groupby('Storey', observed=True).indices
+            self._type_groups = self._elements_df.groupby('Type', observed=True).indices
+        else:
+            self._storey_groups = {}
+            self._type_groups = {}
+        # Dropdown option lists are computed once per session; the
+        # getters just return them (recompute here if editing ever
+        # starts mutating the hierarchy)
+        self._storey_options = ["All"] + list(self.hierarchy.keys())
+        types = set()
+        for storey_types in self.hierarchy.values():
+            types.update(storey_types.keys())
+        self._type_options = ["All"] + sorted(types)
+        self._element_options = ["-- Select Element --"] + list(self.element_lookup.keys())
+
+    @staticmethod
+    def _optimize_vertex_cache(faces, vertex_count):
+        """
+        Reorder triangle indices for GPU post-transform cache locality.
+
+        No-op when meshoptimizer is not installed or the mesh is small.
+        Only the index order changes — vertices stay put, so the
+        per-element vertex ranges and vertexcolor mapping survive.
+        """
+        if meshoptimizer is None or len(faces) <= _VERTEX_CACHE_MIN_FACES:
+            return faces
+        try:
+            indices = np.ascontiguousarray(faces, dtype=np.uint32).ravel()
+            optimized = np.empty_like(indices)
+            meshoptimizer.optimize_vertex_cache(optimized, indices, len(indices), vertex_count)
+            return optimized.reshape(-1, 3).astype(np.int32)
+        except Exception:
+            return faces
+
+    def _build_merged_buffers(self):
+        """
+        Merge every mesh into SoA buffers, once per session.
+
+        Produces the concatenated vertex/face arrays plus parallel
+        per-element (offset, count) ranges, per-vertex colors and hover
+        text. Redraws — full or filtered — then slice these buffers
+        instead of re-decoding and re-concatenating meshes.
+        """
+        if self._merged_verts is not None:
+            return
+
+        all_verts = []
+        all_faces = []
+        element_colors = []
+        element_names = []
+        vertex_counts = []
+        self._vertex_ranges = {}
+        self._face_ranges = {}
+        v_offset = 0
+        f_offset = 0
+
+        for full_name in self._mesh_json:
+            mesh = self._get_mesh(full_name)
+            if mesh is None:
                 continue
-                
-            vertices = mesh.get('vertices', [])
-            faces = mesh.get('faces', [])
-            
-            if not vertices or not faces:
+
+            vertices = mesh.get('vertices')
+            faces = mesh.get('faces')
+
+            if vertices is None or faces is None or not len(vertices) or not len(faces):
                 continue
-            
-            # Determine color
-            if selected_element and full_name == selected_element:
-                color = "yellow"
+
+            n_vertices = len(vertices)
+            n_faces = len(faces)
+            all_verts.append(vertices)
+            all_faces.append(faces + v_offset)
+            element_colors.append(self._get_color(full_name))
+            element_names.append(full_name)
+            vertex_counts.append(n_vertices)
+            self._vertex_ranges[full_name] = (v_offset, n_vertices)
+            self._face_ranges[full_name] = (f_offset, n_faces)
+            v_offset += n_vertices
+            f_offset += n_faces
+
+        if all_verts:
+            self._merged_verts = np.vstack(all_verts)
+            self._merged_faces = np.vstack(all_faces)
+            # Cache-optimized index order is only valid for the full
+            # figure: filtering slices per-element face ranges, which
+            # reordering would scatter
+            self._merged_faces_opt = self._optimize_vertex_cache(
+                self._merged_faces, len(self._merged_verts)
+            )
+            counts = np.asarray(vertex_counts)
+            self._vertexcolor = np.repeat(np.asarray(element_colors, dtype=object), counts)
+            # Full "storey/type/element" paths repeated per vertex bloat
+            # the JSON payload; per-vertex data carries a compact integer
+            # id (resolved through _id2name) and only the short element
+            # name for hover display
+            self._id2name = element_names
+            self._customdata = np.repeat(np.arange(len(element_names), dtype=np.int32), counts)
+            short_names = [name.rsplit('/', 1)[-1] for name in element_names]
+            self._hovertext = np.repeat(np.asarray(short_names, dtype=object), counts)
+        else:
+            self._merged_verts = np.empty((0, 3), dtype=np.float32)
+            self._merged_faces = np.empty((0, 3), dtype=np.int32)
+            self._merged_faces_opt = self._merged_faces
+            self._vertexcolor = np.empty(0, dtype=object)
+            self._id2name = []
+            self._customdata = np.empty(0, dtype=np.int32)
+            self._hovertext = np.empty(0, dtype=object)
+
+    def create_3d_figure(self, selected_element=None, visible_elements=None):
+        """Create the 3D Plotly figure from the cached merged buffers."""
+        self._build_merged_buffers()
+        fig = go.Figure()
+
+        if selected_element is not None and selected_element in self._vertex_ranges:
+            # Route through the range recolor so the highlight state
+            # stays consistent with update_selection
+            prev = self._selected
+            if prev is not None and prev in self._vertex_ranges:
+                start, count = self._vertex_ranges[prev]
+                self._vertexcolor[start:start + count] = self._get_color(prev)
+            start, count = self._vertex_ranges[selected_element]
+            self._vertexcolor[start:start + count] = "yellow"
+            self._selected = selected_element
+
+        if visible_elements is None:
+            verts = self._merged_verts
+            faces = self._merged_faces_opt
+            vertexcolor = self._vertexcolor
+            hovertext = self._hovertext
+            customdata = self._customdata
+        else:
+            # Assemble the subset from slices of the cached buffers
+            parts_v, parts_f, parts_c, parts_h, parts_id = [], [], [], [], []
+            offset = 0
+            for full_name in self._vertex_ranges:
+                if full_name not in visible_elements:
+                    continue
+                v_off, v_cnt = self._vertex_ranges[full_name]
+                f_off, f_cnt = self._face_ranges[full_name]
+                parts_v.append(self._merged_verts[v_off:v_off + v_cnt])
+                parts_f.append(self._merged_faces[f_off:f_off + f_cnt] - v_off + offset)
+                parts_c.append(self._vertexcolor[v_off:v_off + v_cnt])
+                parts_h.append(self._hovertext[v_off:v_off + v_cnt])
+                parts_id.append(self._customdata[v_off:v_off + v_cnt])
+                offset += v_cnt
+            if parts_v:
+                verts = np.vstack(parts_v)
+                faces = np.vstack(parts_f)
+                vertexcolor = np.concatenate(parts_c)
+                hovertext = np.concatenate(parts_h)
+                customdata = np.concatenate(parts_id)
             else:
-                color = self.original_colors.get(full_name, "#cccccc")
-            
-            # Create mesh
-            x = [v[0] for v in vertices]
-            y = [v[1] for v in vertices]
-            z = [v[2] for v in vertices]
-            
-            i = [f[0] for f in faces]
-            j = [f[1] for f in faces]
-            k = [f[2] for f in faces]
-            
+                verts = np.empty((0, 3), dtype=np.float32)
+                faces = np.empty((0, 3), dtype=np.int32)
+                vertexcolor = np.empty(0, dtype=object)
+                hovertext = np.empty(0, dtype=object)
+                customdata = np.empty(0, dtype=np.int32)
+
+        if len(verts):
             fig.add_trace(go.Mesh3d(
-                x=x, y=y, z=z,
-                i=i, j=j, k=k,
-                color=color,
+                x=verts[:, 0], y=verts[:, 1], z=verts[:, 2],
+                i=faces[:, 0], j=faces[:, 1], k=faces[:, 2],
+                vertexcolor=vertexcolor,
                 opacity=1.0,
                 flatshading=True,
-                name=full_name,
-                hoverinfo='name',
+                name="model",
+                customdata=customdata,
+                hovertemplate='%{hovertext}<extra></extra>',
+                hovertext=hovertext,
                 showlegend=False
             ))
-        
+
         # Configure layout
         fig.update_layout(
             scene=dict(
@@ -138,42 +440,46 @@ class GradioIFCViewer:
         """Get all properties for an element as a DataFrame."""
         if not full_name or full_name not in self.element_lookup:
             return pd.DataFrame(columns=['PropertySet', 'Property', 'Value', 'Editable'])
-        
+
+        # Re-clicks on an element hit the cache; add_new_property
+        # invalidates the entry when the element changes
+        cached = self._props_cache.get(full_name)
+        if cached is not None:
+            return cached
+
         element = self.element_lookup[full_name]
         rows = []
         
-        if hasattr(element, 'IsDefinedBy'):
-            for rel in element.IsDefinedBy:
-                if rel.is_a("IfcRelDefinesByProperties"):
-                    pset = rel.RelatingPropertyDefinition
-                    
-                    if pset.is_a("IfcPropertySet") and hasattr(pset, 'HasProperties'):
-                        for prop in pset.HasProperties:
-                            if hasattr(prop, 'NominalValue'):
-                                prop_value = ''
-                                if prop.NominalValue and hasattr(prop.NominalValue, 'wrappedValue'):
-                                    prop_value = prop.NominalValue.wrappedValue
-                                elif prop.NominalValue:
-                                    prop_value = str(prop.NominalValue)
-                                
-                                rows.append({
-                                    'PropertySet': pset.Name,
-                                    'Property': prop.Name,
-                                    'Value': str(prop_value),
-                                    'Editable': '✏️'
-                                })
-                    
-                    elif pset.is_a("IfcElementQuantity") and hasattr(pset, 'Quantities'):
-                        for qty in pset.Quantities:
-                            qty_value = self._get_qty_value(qty)
-                            rows.append({
-                                'PropertySet': pset.Name,
-                                'Property': qty.Name,
-                                'Value': f"{qty_value:.4f}" if isinstance(qty_value, float) else str(qty_value),
-                                'Editable': '✏️'
-                            })
-        
-        return pd.DataFrame(rows)
+        for pset in self._psets_by_element.get(element.GlobalId, ()):
+            if pset.is_a("IfcPropertySet") and hasattr(pset, 'HasProperties'):
+                for prop in pset.HasProperties:
+                    if hasattr(prop, 'NominalValue'):
+                        prop_value = ''
+                        if prop.NominalValue and hasattr(prop.NominalValue, 'wrappedValue'):
+                            prop_value = prop.NominalValue.wrappedValue
+                        elif prop.NominalValue:
+                            prop_value = str(prop.NominalValue)
+
+                        rows.append({
+                            'PropertySet': pset.Name,
+                            'Property': prop.Name,
+                            'Value': str(prop_value),
+                            'Editable': '✏️'
+                        })
+
+            elif pset.is_a("IfcElementQuantity") and hasattr(pset, 'Quantities'):
+                for qty in pset.Quantities:
+                    qty_value = self._get_qty_value(qty)
+                    rows.append({
+                        'PropertySet': pset.Name,
+                        'Property': qty.Name,
+                        'Value': f"{qty_value:.4f}" if isinstance(qty_value, float) else str(qty_value),
+                        'Editable': '✏️'
+                    })
+
+        props_df = pd.DataFrame(rows)
+        self._props_cache[full_name] = props_df
+        return props_df
     
     @staticmethod
     def _get_qty_value(qty):
@@ -192,50 +498,117 @@ class GradioIFCViewer:
     
     def get_elements_table(self, storey_filter="All", type_filter="All"):
         """Get elements table as DataFrame with filters applied."""
-        df = pd.DataFrame(self.elements_data)
-        
+        df = self._elements_df
+        if df.empty:
+            return df
+
+        no_rows = np.empty(0, dtype=np.intp)
+        if storey_filter != "All" and type_filter != "All":
+            idx = np.intersect1d(
+                self._storey_groups.get(storey_filter, no_rows),
+                self._type_groups.get(type_filter, no_rows)
+            )
+            return df.iloc[idx]
         if storey_filter != "All":
-            df = df[df['Storey'] == storey_filter]
+            return df.iloc[self._storey_groups.get(storey_filter, no_rows)]
         if type_filter != "All":
-            df = df[df['Type'] == type_filter]
-        
+            return df.iloc[self._type_groups.get(type_filter, no_rows)]
         return df
     
     def get_storey_options(self):
         """Get list of storeys for dropdown."""
-        return ["All"] + list(self.hierarchy.keys())
-    
+        return self._storey_options
+
     def get_type_options(self):
         """Get list of IFC types for dropdown."""
-        types = set()
-        for storey_types in self.hierarchy.values():
-            types.update(storey_types.keys())
-        return ["All"] + sorted(list(types))
-    
+        return self._type_options
+
     def get_element_options(self):
         """Get list of element full names for dropdown."""
-        return ["-- Select Element --"] + list(self.element_lookup.keys())
+        return self._element_options
     
+    def bulk_add_properties(self, element, pset_name, properties):
+        """
+        Add several properties to one pset with a single HasProperties write.
+
+        Resolves (or creates) the property set once and extends
+        HasProperties in exactly one assignment, so scripted bulk adds
+        stay linear instead of re-copying the tuple per property. The
+        UI's single-add handler routes through here with a dict of one.
+
+        Parameters:
+        -----------
+        element : IFC element
+            The element to attach the properties to
+        pset_name : str
+            Name of the property set to extend or create
+        properties : dict
+            Mapping of property name to value (stored as IfcText)
+
+        Returns:
+        --------
+        IfcPropertySet
+            The extended or newly created property set
+        """
+        pset = None
+        for candidate in self._psets_by_element.get(element.GlobalId, ()):
+            if candidate.Name == pset_name:
+                pset = candidate
+                break
+
+        if pset is None:
+            owner_history = self.model.by_type("IfcOwnerHistory")[0] if self.model.by_type("IfcOwnerHistory") else None
+            pset = self.model.create_entity(
+                "IfcPropertySet",
+                GlobalId=self.model.create_guid(),
+                OwnerHistory=owner_history,
+                Name=pset_name,
+                HasProperties=[]
+            )
+            self.model.create_entity(
+                "IfcRelDefinesByProperties",
+                GlobalId=self.model.create_guid(),
+                OwnerHistory=owner_history,
+                RelatedObjects=[element],
+                RelatingPropertyDefinition=pset
+            )
+            # Keep the pset index in sync with the model
+            self._psets_by_element[element.GlobalId].append(pset)
+
+        new_props = tuple(
+            self.model.create_entity(
+                "IfcPropertySingleValue",
+                Name=name,
+                NominalValue=self.model.create_entity("IfcText", str(value))
+            )
+            for name, value in properties.items()
+        )
+        existing = tuple(pset.HasProperties) if getattr(pset, 'HasProperties', None) else ()
+        pset.HasProperties = existing + new_props
+        return pset
+
     def launch(self):
         """Launch the Gradio interface."""
         
         # State for new properties
         new_properties = []
         
-        def update_3d_view(selected_element):
+        # Handlers are async so heavy figure/table construction runs in
+        # a worker thread instead of blocking the Gradio event loop
+        async def update_3d_view(selected_element):
             """Update 3D view with selection highlight."""
             sel = selected_element if selected_element != "-- Select Element --" else None
-            return self.create_3d_figure(selected_element=sel)
-        
-        def update_properties_table(selected_element):
+            return await asyncio.to_thread(self.update_selection, sel)
+
+        async def update_properties_table(selected_element):
             """Update properties table for selected element."""
             if selected_element == "-- Select Element --":
                 return pd.DataFrame(columns=['PropertySet', 'Property', 'Value', 'Editable'])
-            return self.get_element_properties(selected_element)
-        
-        def filter_elements(storey, ifc_type):
+            return await asyncio.to_thread(self.get_element_properties, selected_element)
+
+        async def filter_elements(storey, ifc_type):
             """Filter elements table."""
-            df = self.get_elements_table(storey, ifc_type)
+            df = await asyncio.to_thread(self.get_elements_table, storey, ifc_type)
             # Return only display columns
             display_cols = ['Storey', 'Type', 'Name', 'GUID']
             return df[display_cols] if not df.empty else pd.DataFrame(columns=display_cols)
@@ -254,57 +627,20 @@ class GradioIFCViewer:
                 return "⚠️ Select an element first", None
             if not pset_name or not prop_name:
                 return "⚠️ Fill PropertySet and Property name", None
-            
+
             # Add to IFC model
             element = self.element_lookup.get(selected_element)
             if not element:
                 return "⚠️ Element not found", None
-            
+
             try:
-                # Find or create PropertySet
-                pset = None
-                if hasattr(element, 'IsDefinedBy'):
-                    for rel in element.IsDefinedBy:
-                        if rel.is_a("IfcRelDefinesByProperties"):
-                            if rel.RelatingPropertyDefinition.Name == pset_name:
-                                pset = rel.RelatingPropertyDefinition
-                                break
-                
-                if pset is None:
-                    # Create new PropertySet
-                    owner_history = self.model.by_type("IfcOwnerHistory")[0] if self.model.by_type("IfcOwnerHistory") else None
-                    pset = self.model.create_entity(
-                        "IfcPropertySet",
-                        GlobalId=self.model.create_guid(),
-                        OwnerHistory=owner_history,
-                        Name=pset_name,
-                        HasProperties=[]
-                    )
-                    self.model.create_entity(
-                        "IfcRelDefinesByProperties",
-                        GlobalId=self.model.create_guid(),
-                        OwnerHistory=owner_history,
-                        RelatedObjects=[element],
-                        RelatingPropertyDefinition=pset
-                    )
-                
-                # Create property
-                new_prop = self.model.create_entity(
-                    "IfcPropertySingleValue",
-                    Name=prop_name,
-                    NominalValue=self.model.create_entity("IfcText", prop_value)
-                )
-                
-                # Add to PropertySet
-                if hasattr(pset, 'HasProperties'):
-                    props = list(pset.HasProperties) if pset.HasProperties else []
-                    props.append(new_prop)
-                    pset.HasProperties = props
-                
-                # Update table
+                self.bulk_add_properties(element, pset_name, {prop_name: prop_value})
+
+                # Update table (dropping the stale cached DataFrame)
+                self._props_cache.pop(selected_element, None)
                 new_df = self.get_element_properties(selected_element)
                 return f"✅ Added {pset_name}/{prop_name} = {prop_value}", new_df
-                
+
             except Exception as e:
                 return f"❌ Error: {str(e)}", None
         
@@ -323,13 +659,13 @@ class GradioIFCViewer:
             gr.Markdown("# 🏗️ IFC Model Viewer - Interactive 3D with Editable Properties")
             
             # Store current elements table as state
-            elements_state = gr.State(pd.DataFrame(self.elements_data))
+            elements_state = gr.State(self._elements_df)
             
             with gr.Row():
                 # Left column: 3D View and filters
                 with gr.Column(scale=2):
                     gr.Markdown("### 📊 3D Model View")
-                    plot_3d = gr.Plot(value=self.create_3d_figure(), label="3D View")
+                    plot_3d = gr.Plot(value=self._base_fig, label="3D View")
                     
                     gr.Markdown("### 🔍 Filters")
                     with gr.Row():
@@ -454,7 +790,9 @@ def visualize_ifc_gradio(ifc_source, color_config_path=None, share=False):
     from pathlib import Path
     
     print("🚀 Loading IFC model...")
-    model = IFCDownloader.download_and_load(ifc_source)
+    local_path = IFCDownloader.resolve(ifc_source)
+    model = IFCDownloader.download_and_load(str(local_path))
+    cache_key = IFCDownloader.file_hash(local_path)
     
     print("📊 Building hierarchy...")
     hierarchy_builder = HierarchicalStructure(model)
@@ -471,7 +809,7 @@ def visualize_ifc_gradio(ifc_source, color_config_path=None, share=False):
     geometry_extractor = GeometryExtractor(color_config_path)
     
     print("🔧 Building Gradio interface...")
-    viewer = GradioIFCViewer(model, hierarchy, geometry_extractor)
+    viewer = GradioIFCViewer(model, hierarchy, geometry_extractor, cache_key=cache_key)
     demo = viewer.launch()
     
     print("✅ Launching viewer...")
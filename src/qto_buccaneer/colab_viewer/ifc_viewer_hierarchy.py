@@ -3,6 +3,7 @@ Hierarchical Structure Module for qto_buccaneer Viewer
 Builds and manages the hierarchical organization of IFC elements.
 """
 
+import pandas as pd
 from collections import defaultdict
 from .ifc_viewer_geometry import GeometryExtractor
 
@@ -45,35 +46,41 @@ class HierarchicalStructure:
             self._build_fallback_hierarchy()
             return
 
+    def _elements_with_custom_mesh(self):
+        """
+        Products carrying a Custom_Mesh, found in one relations pass.
+
+        Probing each product with extract_custom_mesh_from_entity walks
+        its IsDefinedBy chain per element; inverting the property
+        relations once makes the presence test a dict lookup.
+        """
+        definitions_index = GeometryExtractor.build_definitions_index(self.model)
+        return [
+            element for element in self.model.by_type("IfcProduct")
+            if (definitions_index.get(element.id()) or {}).get('mesh')
+        ]
+
     def _build_fallback_hierarchy(self):
         """Build fallback hierarchy when elements aren't in storeys."""
-        elements_with_mesh = []
-        all_products = self.model.by_type("IfcProduct")
-        
-        for element in all_products:
-            if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                elements_with_mesh.append(element)
-        
+        elements_with_mesh = self._elements_with_custom_mesh()
+
         building_storeys = self.model.by_type("IfcBuildingStorey")
-        
+
+        # One pass over the containment relations builds element id ->
+        # storey; the per-element storey search is then a dict lookup
+        # instead of scanning every storey's RelatedElements list
+        storey_by_element = {}
+        for rel in self.model.by_type("IfcRelContainedInSpatialStructure"):
+            structure = rel.RelatingStructure
+            if structure is not None and structure.is_a("IfcBuildingStorey"):
+                for related in rel.RelatedElements or ():
+                    storey_by_element[related.id()] = structure
+
+        default_storey = building_storeys[0] if building_storeys else None
+
         for element in elements_with_mesh:
-            assigned_storey = None
-            for storey in building_storeys:
-                if hasattr(storey, 'ContainsElements'):
-                    for rel in storey.ContainsElements:
-                        if rel.is_a("IfcRelContainedInSpatialStructure"):
-                            if element in rel.RelatedElements:
-                                assigned_storey = storey
-                                break
-                if assigned_storey:
-                    break
-            
-            if not assigned_storey:
-                if building_storeys:
-                    assigned_storey = building_storeys[0]
-                else:
-                    assigned_storey = None
-            
+            assigned_storey = storey_by_element.get(element.id(), default_storey)
+
             if assigned_storey:
                 storey_name = assigned_storey.Name or f"Storey_{assigned_storey.GlobalId[:8]}"
             else:
@@ -84,20 +91,44 @@ class HierarchicalStructure:
 
     def _build_default_hierarchy(self):
         """Build default hierarchy for models without storeys."""
-        all_products = self.model.by_type("IfcProduct")
-        for element in all_products:
-            if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                storey_name = "Default_Level"
-                ifc_type = element.is_a()
-                self.hierarchy[storey_name][ifc_type].append(element)
+        for element in self._elements_with_custom_mesh():
+            self.hierarchy["Default_Level"][element.is_a()].append(element)
 
     def get_hierarchy(self):
         """
         Get the built hierarchy.
-        
+
         Returns:
         --------
         dict
             Dictionary mapping storey names to IFC types to elements
         """
         return dict(self.hierarchy)
+
+    def as_dataframe(self):
+        """
+        Flatten the hierarchy into a DataFrame with categorical columns.
+
+        Categorical Storey/Type columns store small integer codes
+        instead of repeated Python strings, so filter comparisons run
+        on the codes and memory stays flat as element count grows.
+
+        Returns:
+        --------
+        pd.DataFrame
+            Columns 'storey', 'type' (categorical) and 'element_id'
+        """
+        storeys = []
+        types = []
+        element_ids = []
+        for storey_name, by_type in self.hierarchy.items():
+            for ifc_type, elements in by_type.items():
+                for element in elements:
+                    storeys.append(storey_name)
+                    types.append(ifc_type)
+                    element_ids.append(element.id())
+        return pd.DataFrame({
+            'storey': pd.Categorical(storeys),
+            'type': pd.Categorical(types),
+            'element_id': element_ids
+        })
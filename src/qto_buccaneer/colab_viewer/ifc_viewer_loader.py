@@ -3,43 +3,107 @@ IFC Download and Loading Module for qto_buccaneer Viewer
 Handles downloading and loading IFC files from URLs or local paths.
 """
 
+import hashlib
 import ifcopenshell
+import os
 import requests
 from pathlib import Path
 
+# Downloaded IFC files cached by URL hash, revalidated via ETag
+_URL_CACHE_DIR = Path.home() / ".cache" / "qto_buccaneer" / "ifc"
+
 
 class IFCDownloader:
     """Handles downloading and loading IFC files."""
-    
+
+    @staticmethod
+    def resolve(source):
+        """
+        Return a local path for the source, downloading it first if needed.
+
+        Downloads stream to disk in 1MB chunks instead of buffering the
+        whole file in RAM, and land in a per-URL cache so relaunches skip
+        the network entirely (or get a cheap 304 when the server sent an
+        ETag).
+
+        Parameters:
+        -----------
+        source : str
+            URL or local file path to IFC file
+
+        Returns:
+        --------
+        Path
+            Local path to the IFC file
+        """
+        if not (source.startswith('http://') or source.startswith('https://')):
+            return Path(source)
+
+        cache_path = _URL_CACHE_DIR / f"{hashlib.sha1(source.encode()).hexdigest()}.ifc"
+        etag_path = cache_path.with_suffix('.etag')
+
+        headers = {}
+        if cache_path.exists():
+            if not etag_path.exists():
+                # No validator to revalidate with: trust the cached copy
+                return cache_path
+            headers['If-None-Match'] = etag_path.read_text()
+
+        with requests.get(source, stream=True, timeout=30, headers=headers) as response:
+            if response.status_code == 304:
+                return cache_path
+            response.raise_for_status()
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.part')
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+            os.replace(tmp_path, cache_path)
+            etag = response.headers.get('ETag')
+            if etag:
+                etag_path.write_text(etag)
+            elif etag_path.exists():
+                etag_path.unlink()
+        return cache_path
+
+    @staticmethod
+    def file_hash(path):
+        """
+        SHA-256 of the file bytes, for keying derived-data caches.
+
+        Parameters:
+        -----------
+        path : str or Path
+            Local path to hash
+
+        Returns:
+        --------
+        str
+            Hex digest of the file contents
+        """
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
     @staticmethod
     def download_and_load(source):
         """
         Download and load an IFC file from URL or local path.
-        
+
         Parameters:
         -----------
         source : str
             URL or local file path to IFC file
-            
+
         Returns:
         --------
         ifcopenshell.file
             Loaded IFC model
         """
         try:
-            # Check if source is a URL
-            if source.startswith('http://') or source.startswith('https://'):
-                response = requests.get(source, timeout=30)
-                response.raise_for_status()
-                temp_path = Path("temp.ifc")
-                with open(temp_path, "wb") as f:
-                    f.write(response.content)
-                model = ifcopenshell.open(str(temp_path))
-            else:
-                # Load from local path
-                model = ifcopenshell.open(source)
-            
-            return model
+            return ifcopenshell.open(str(IFCDownloader.resolve(source)))
         except requests.RequestException as e:
             raise Exception(f"Error downloading IFC file: {e}")
         except Exception as e:
@@ -4,11 +4,21 @@ Provides hierarchical tables, filters, interactive controls, editable property p
 and IFC save functionality for IFC model visualization.
 """
 
+import ifcopenshell
+import ifcopenshell.guid
 import ipywidgets as widgets
 from IPython.display import display
 import plotly.graph_objects as go
-from collections import defaultdict
-from .ifc_viewer_geometry import GeometryExtractor
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .ifc_viewer_geometry import GeometryExtractor, _QTY_ATTR
+
+# One cached record per element; callbacks read storey/type/name from
+# here instead of re-splitting or re-formatting full_name strings
+ElementRec = namedtuple(
+    'ElementRec',
+    ['storey', 'ifc_type', 'element', 'element_name', 'full_name', 'qto_props']
+)
 
 
 class HierarchicalTableUI:
@@ -40,15 +50,48 @@ class HierarchicalTableUI:
         self.hierarchy = hierarchy
         self.visualizer = visualizer
         self.model = model
-        self.all_checkboxes = {}
+        # One SelectMultiple per materialized (storey, type) section
+        self._section_selectors = []
         self.table_output = widgets.Output()
         self.filter_storey = None
         self.filter_ifc_type = None
+
+        # Dropdown option lists computed once; create_ui can warm-start
+        # without re-deriving them from the hierarchy
+        self._storey_options = ['All'] + sorted(self.hierarchy.keys())
+        self._ifc_type_options = ['All'] + sorted(dict.fromkeys(
+            ifc_type for storey in self.hierarchy.values() for ifc_type in storey
+        ))
+
+        # Persistent table widgets: the Plotly table FigureWidget and
+        # the view toggle are created once and refreshed in place, so
+        # filter changes don't tear down and rebuild the DOM
+        self._table_fig = None
+        self._table_cells = None
+        self._table_view_toggle = None
+        self._table_content = None
+        self._button_list_box = None
+        # go.Table degrades past a few hundred rows, so the table renders
+        # one page of the full column data at a time
+        self._page_size = 200
+        self._page = 0
+        self._table_search = ''
+        self._table_header = None
+        self._table_full_cells = None
+        self._table_row_colors = None
+        self._table_container = None
+        # Built column data per (storey, type, search) combination, so
+        # re-applying a recent filter skips the row-building pass
+        self._table_data_cache = {}
+        # Visible-name set per (storey, type) filter pair
+        self._filter_cache = {}
         
         # Editable properties state
         self.current_selected_element = None
         self.current_selected_full_name = None
         self.properties_widgets = {}  # (pset_name, prop_name) -> Text widget
+        self._dirty_props = set()  # (pset_name, prop_name) keys edited since last save
+        self._current_psets_by_name = {}  # pset name -> entity for the shown element
         self.editable_props_container = widgets.VBox(
             layout=widgets.Layout(
                 border='1px solid #ddd',
@@ -59,7 +102,8 @@ class HierarchicalTableUI:
             )
         )
         self.save_status = widgets.HTML(value="")
-        self.new_props_container = widgets.VBox()
+        self._new_props_output = widgets.Output()
+        self.new_props_container = widgets.VBox([self._new_props_output])
         
         # Element selector dropdown
         self.element_selector = widgets.Dropdown(
@@ -67,19 +111,188 @@ class HierarchicalTableUI:
             layout=widgets.Layout(width='400px')
         )
         self.element_selector.observe(self._on_element_dropdown_change, names='value')
-        
+        # Kept in sync with element_selector.options so membership
+        # checks on click are O(1) instead of rebuilding the list
+        self._selector_options_set = set()
+
         # Build element lookup
         self.element_lookup = {}
+        self._name_by_id = {}
         self._build_element_lookup()
 
+        # One extraction pass feeds every consumer (table, accordion,
+        # selector, button list): mesh presence and QTO props per
+        # element are cached here instead of re-walking IsDefinedBy at
+        # each UI rebuild. The pass runs on a background worker in
+        # chunks so create_ui renders immediately instead of blocking
+        # the kernel on large models; each finished chunk refreshes the
+        # table cells and selector in place.
+        self._full_name_by_id = {}
+        self._elements_flat = []
+        self._records_by_full_name = {}
+        covering_index = GeometryExtractor.build_covering_index(model)
+        definitions_index = GeometryExtractor.build_definitions_index(model)
+        # Kept for selection: wall id -> coverings, so showing a wall's
+        # properties does not rescan IfcRelCoversBldgElements
+        self._covering_index = covering_index
+        self._extraction_progress = widgets.HTML(
+            value="<small>⏳ Extracting element data...</small>"
+        )
+        self._extraction_executor = ThreadPoolExecutor(max_workers=1)
+        self._extraction_future = self._extraction_executor.submit(
+            self._extract_element_data, covering_index, definitions_index
+        )
+
+        # Property relations inverted once: the pset walk per selection
+        # becomes a dict hit instead of an IsDefinedBy traversal per
+        # click. Display rows are cached per element on first selection
+        # and dropped when that element's properties are saved.
+        self._psets_by_id = defaultdict(list)
+        for rel in model.by_type("IfcRelDefinesByProperties"):
+            pset = rel.RelatingPropertyDefinition
+            for obj in rel.RelatedObjects:
+                self._psets_by_id[obj.id()].append(pset)
+        self._prop_rows_cache = {}
+        self._covering_rows_cache = {}
+        # Resolved once; new-pset saves reuse it instead of an
+        # IfcOwnerHistory by_type scan per created pset
+        oh_list = model.by_type("IfcOwnerHistory")
+        self._owner_history = oh_list[0] if oh_list else None
+
+        # Trace name -> index into fig.data, so visibility/color updates
+        # address their trace directly instead of scanning all traces;
+        # the object map saves the fig.data tuple indexing as well. No
+        # traces are added after the visualizer hands the figure over,
+        # so neither map needs rebuilding.
+        self._trace_index = {trace.name: i for i, trace in enumerate(visualizer.fig.data)}
+        self._trace_by_name = {trace.name: trace for trace in visualizer.fig.data}
+
+        # Full-name sets per storey and per type: applying a filter is
+        # then two dict lookups and a set intersection instead of
+        # splitting every mesh name on each apply
+        self._meshes_by_storey = defaultdict(set)
+        self._meshes_by_type = defaultdict(set)
+        for full_name in visualizer.mesh_dict:
+            parts = full_name.split('/')
+            if len(parts) > 1:
+                self._meshes_by_storey[parts[0]].add(full_name)
+                self._meshes_by_type[parts[1]].add(full_name)
+
+        # Set while code syncs selector values programmatically so
+        # their observers don't re-render once per assignment
+        self._suppress_observer = False
+
+    def _iter_filtered_elements(self):
+        """Yield cached element records matching the active filters."""
+        # 'All' checks hoisted out of the per-element loop
+        any_storey = self.filter_storey in (None, 'All')
+        any_type = self.filter_ifc_type in (None, 'All')
+        for rec in self._elements_flat:
+            if not any_storey and rec.storey != self.filter_storey:
+                continue
+            if not any_type and rec.ifc_type != self.filter_ifc_type:
+                continue
+            yield rec
+
+    def _iter_hierarchy(self):
+        """Yield (storey_name, ifc_type, element) over the whole hierarchy.
+
+        Flattens the storey/type/element nesting once so consumers iterate
+        a single level instead of repeating the triple-nested loop.
+        """
+        return (
+            (storey_name, ifc_type, element)
+            for storey_name, types in self.hierarchy.items()
+            for ifc_type, elements in types.items()
+            for element in elements
+        )
+
+    def _extract_element_data(self, covering_index, definitions_index):
+        """Extract mesh/QTO data for all elements on the worker thread.
+
+        Runs in chunks of 200 so the kernel stays responsive; after each
+        chunk the progress label, table cells and element selector are
+        refreshed in place with whatever is cached so far.
+        """
+        work_items = list(self._iter_hierarchy())
+        total = len(work_items)
+        chunk_size = 200
+
+        try:
+            for start in range(0, total, chunk_size):
+                for storey_name, ifc_type, element in work_items[start:start + chunk_size]:
+                    mesh_json, qto_props = GeometryExtractor.extract_mesh_and_qto(
+                        element, self.model, covering_index, definitions_index
+                    )
+                    if mesh_json is None:
+                        continue
+                    element_name = self._element_name(element)
+                    full_name = f"{storey_name}/{ifc_type}/{element_name}"
+                    self._full_name_by_id[element.id()] = full_name
+                    rec = ElementRec(
+                        storey_name, ifc_type, element, element_name, full_name, qto_props
+                    )
+                    self._elements_flat.append(rec)
+                    self._records_by_full_name[full_name] = rec
+
+                done = min(start + chunk_size, total)
+                self._extraction_progress.value = (
+                    f"<small>⏳ Extracted {done}/{total} elements...</small>"
+                )
+                self._on_extraction_chunk()
+        except Exception as e:
+            # Nothing inspects the future, so an unreported error would
+            # masquerade as a successful pass with a truncated list
+            self._extraction_progress.value = (
+                f"<small>❌ Extraction failed after "
+                f"{len(self._elements_flat)} elements: {e}</small>"
+            )
+        else:
+            self._extraction_progress.value = (
+                f"<small>✅ {len(self._elements_flat)} elements ready</small>"
+            )
+        finally:
+            # Final refresh so the visible view shows every extracted
+            # row even if the loop ended mid-chunk
+            self._on_extraction_chunk()
+            self._extraction_executor.shutdown(wait=False)
+
+    def _on_extraction_chunk(self):
+        """Refresh in-place views with the rows cached so far."""
+        self._table_data_cache.clear()
+        try:
+            if self._table_content is not None:
+                if self._table_view_toggle.value or self._table_container is None:
+                    # Button-list view (the default) re-renders from the
+                    # rows cached so far
+                    self._refresh_table_content()
+                else:
+                    # Rewrites only the existing FigureWidget's cells
+                    self._create_table()
+            self._update_element_selector()
+        except Exception:
+            # A refresh racing UI construction must not kill extraction
+            pass
+
+    def _element_name(self, element):
+        """Display name for an element, memoized by entity id.
+
+        Name/is_a/GlobalId reads go through ifcopenshell's wrapped-data
+        indirection; each element's name is decoded exactly once no
+        matter how many index builds ask for it.
+        """
+        element_id = element.id()
+        name = self._name_by_id.get(element_id)
+        if name is None:
+            name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
+            self._name_by_id[element_id] = name
+        return name
+
     def _build_element_lookup(self):
         """Build lookup dict from full_name to IFC element."""
-        for storey_name, types in self.hierarchy.items():
-            for ifc_type, elements in types.items():
-                for element in elements:
-                    element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
-                    full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                    self.element_lookup[full_name] = element
+        for storey_name, ifc_type, element in self._iter_hierarchy():
+            full_name = f"{storey_name}/{ifc_type}/{self._element_name(element)}"
+            self.element_lookup[full_name] = element
 
     def create_ui(self):
         """
@@ -92,21 +305,16 @@ class HierarchicalTableUI:
         """
         print("🔧 Starting UI creation with 3D click selection and editable properties...")
         
-        # Create filter dropdowns
-        storey_options = ['All'] + sorted(list(self.hierarchy.keys()))
-        ifc_type_options = ['All'] + sorted(set(
-            ifc_type for storey in self.hierarchy.values() for ifc_type in storey.keys()
-        ))
-        
+        # Create filter dropdowns from the option lists cached at init
         self.storey_dropdown = widgets.Dropdown(
-            options=storey_options,
+            options=self._storey_options,
             value='All',
             description='Storey:',
             layout=widgets.Layout(width='300px')
         )
-        
+
         self.ifc_type_dropdown = widgets.Dropdown(
-            options=ifc_type_options,
+            options=self._ifc_type_options,
             value='All',
             description='IFC Type:',
             layout=widgets.Layout(width='300px')
@@ -139,8 +347,8 @@ class HierarchicalTableUI:
             layout=widgets.Layout(width='120px')
         )
         
-        expand_all_btn.on_click(lambda x: self._expand_all_accordions(visibility_accordion))
-        collapse_all_btn.on_click(lambda x: self._collapse_all_accordions(visibility_accordion))
+        expand_all_btn.on_click(lambda x: self._expand_all_accordions())
+        collapse_all_btn.on_click(lambda x: self._collapse_all_accordions())
         
         buttons_box = widgets.HBox([expand_all_btn, collapse_all_btn])
         
@@ -203,6 +411,7 @@ class HierarchicalTableUI:
                 widgets.HTML("<b>🔍 Select Element:</b> "),
                 self.element_selector
             ]),
+            self._extraction_progress,
             self.table_output,
             visibility_panel
         ])
@@ -236,11 +445,12 @@ class HierarchicalTableUI:
                 full_name = trace.name
                 if full_name in self.visualizer.mesh_dict:
                     self.current_hovered[0] = full_name
-                    parts = full_name.split('/')
-                    short_name = parts[-1] if parts else full_name
+                    rec = self._records_by_full_name.get(full_name)
+                    short_name = rec.element_name if rec else full_name
+                    ifc_type = rec.ifc_type if rec else 'Unknown'
                     self.hovered_element_label.value = (
                         f"<small>🔍 Hover: <b style='color:#2196F3'>{short_name}</b> "
-                        f"({parts[1] if len(parts) > 1 else 'Unknown'})</small>"
+                        f"({ifc_type})</small>"
                     )
         
         # Attach hover handlers to all traces
@@ -256,7 +466,7 @@ class HierarchicalTableUI:
             full_name = self.current_hovered[0]
             # Update dropdown
             self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
-            if full_name in list(self.element_selector.options):
+            if full_name in self._selector_options_set:
                 self.element_selector.value = full_name
             self.element_selector.observe(self._on_element_dropdown_change, names='value')
             self._select_mesh(full_name)
@@ -277,7 +487,7 @@ class HierarchicalTableUI:
             if full_name in self.visualizer.mesh_dict:
                 # Update dropdown without triggering observer
                 self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
-                if full_name in [opt for opt in self.element_selector.options]:
+                if full_name in self._selector_options_set:
                     self.element_selector.value = full_name
                 self.element_selector.observe(self._on_element_dropdown_change, names='value')
                 self._select_mesh(full_name)
@@ -290,22 +500,15 @@ class HierarchicalTableUI:
     
     def _update_element_selector(self):
         """Update element selector dropdown with visible elements."""
-        visible_elements = []
-        for storey_name, types in self.hierarchy.items():
-            if self.filter_storey and self.filter_storey != 'All' and storey_name != self.filter_storey:
-                continue
-            for ifc_type, elements in types.items():
-                if self.filter_ifc_type and self.filter_ifc_type != 'All' and ifc_type != self.filter_ifc_type:
-                    continue
-                for element in elements:
-                    if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                        element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
-                        full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                        if full_name in self.visualizer.mesh_dict:
-                            visible_elements.append(full_name)
+        visible_elements = [
+            full_name
+            for _, _, _, _, full_name, _ in self._iter_filtered_elements()
+            if full_name in self.visualizer.mesh_dict
+        ]
         
         self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
         self.element_selector.options = [''] + sorted(visible_elements)
+        self._selector_options_set = set(self.element_selector.options)
         self.element_selector.value = ''
         self.element_selector.observe(self._on_element_dropdown_change, names='value')
 
@@ -313,37 +516,49 @@ class HierarchicalTableUI:
         """Select and highlight a mesh, showing editable properties."""
         if full_name not in self.visualizer.mesh_dict:
             return
-        
+
+        previous = self.visualizer.selected_mesh[0]
         self.visualizer.selected_mesh[0] = full_name
-        
-        # Highlight selected mesh in yellow using batch_update for efficiency
+
+        # Only the previously selected and newly selected traces change
+        # color; resolving them through the name -> trace map avoids a
+        # scan (and repeated fig.data tuple indexing) per click
+        fig = self.visualizer.fig
+        prev_trace = self._trace_by_name.get(previous) if previous and previous != full_name else None
+        trace = self._trace_by_name.get(full_name)
+
         if self.visualizer._is_figure_widget:
-            with self.visualizer.fig.batch_update():
-                for trace in self.visualizer.fig.data:
-                    color = "#ffff00" if trace.name == full_name else self.visualizer.original_colors.get(trace.name, "#cccccc")
-                    trace.color = color
+            with fig.batch_update():
+                if prev_trace is not None:
+                    prev_trace.color = self.visualizer.original_colors.get(previous, "#cccccc")
+                if trace is not None:
+                    trace.color = "#ffff00"
         else:
-            for i, trace in enumerate(self.visualizer.fig.data):
-                color = "#ffff00" if trace.name == full_name else self.visualizer.original_colors.get(trace.name, "#cccccc")
-                self.visualizer.fig.data[i].color = color
+            if prev_trace is not None:
+                prev_trace.color = self.visualizer.original_colors.get(previous, "#cccccc")
+            if trace is not None:
+                trace.color = "#ffff00"
             self._update_viewer()
-        
+
         # Show editable properties for this element
         self._show_editable_properties(full_name)
 
     def _deselect_current(self):
         """Deselect the currently selected mesh."""
+        previous = self.visualizer.selected_mesh[0]
         self.visualizer.selected_mesh[0] = None
-        
-        if self.visualizer._is_figure_widget:
-            with self.visualizer.fig.batch_update():
-                for trace in self.visualizer.fig.data:
-                    trace.color = self.visualizer.original_colors.get(trace.name, "#cccccc")
-        else:
-            for i, trace in enumerate(self.visualizer.fig.data):
-                self.visualizer.fig.data[i].color = self.visualizer.original_colors.get(trace.name, "#cccccc")
-            self._update_viewer()
-        
+
+        prev_trace = self._trace_by_name.get(previous) if previous else None
+        if prev_trace is not None:
+            color = self.visualizer.original_colors.get(previous, "#cccccc")
+            if self.visualizer._is_figure_widget:
+                with self.visualizer.fig.batch_update():
+                    prev_trace.color = color
+            else:
+                prev_trace.color = color
+                self._update_viewer()
+
+        self._close_widget_tree(self.editable_props_container.children)
         self.editable_props_container.children = [
             widgets.HTML("<b>📋 Element Properties:</b><br><i>No element selected</i>")
         ]
@@ -352,18 +567,158 @@ class HierarchicalTableUI:
     # Editable Properties Panel
     # -------------------------------------------------------------------------
     
+    def _get_prop_rows(self, element):
+        """Pset/quantity display rows for an element, cached per element.
+
+        Built from the inverted property-relation index on first
+        selection; _save_properties_to_ifc drops the entry so edited
+        values are re-read on the next selection.
+        """
+        rows_data = self._prop_rows_cache.get(element.id())
+        if rows_data is not None:
+            return rows_data
+
+        rows_data = []
+        for pset in self._psets_by_id.get(element.id(), ()):
+            # One no-arg is_a() and one Name read per pset; every further
+            # use is a local, avoiding repeated wrapped_data calls
+            pset_type = pset.is_a()
+            pset_name = getattr(pset, 'Name', None)
+            if pset_type == "IfcPropertySet" and hasattr(pset, 'HasProperties'):
+                entries = []
+                for prop in pset.HasProperties:
+                    if hasattr(prop, 'NominalValue'):
+                        prop_name = getattr(prop, 'Name', 'Unknown')
+                        nominal = prop.NominalValue
+                        prop_value = ''
+                        if nominal and hasattr(nominal, 'wrappedValue'):
+                            prop_value = nominal.wrappedValue
+                        elif nominal:
+                            prop_value = str(nominal)
+                        entries.append((prop_name, str(prop_value)))
+                rows_data.append((
+                    f"<hr><b style='color:#4CAF50'>📁 {pset_name}</b>", pset_name, entries
+                ))
+            elif pset_type == "IfcElementQuantity" and hasattr(pset, 'Quantities'):
+                entries = []
+                for qty in pset.Quantities:
+                    qty_value = self._get_qty_value(qty)
+                    entries.append((
+                        getattr(qty, 'Name', 'Unknown'),
+                        str(qty_value) if qty_value is not None else ''
+                    ))
+                rows_data.append((
+                    f"<hr><b style='color:#2196F3'>📐 {pset_name}</b>", pset_name, entries
+                ))
+
+        self._prop_rows_cache[element.id()] = rows_data
+        return rows_data
+
+    def _get_covering_rows(self, element):
+        """Covering quantity display rows for a wall, cached per wall."""
+        cov_rows = self._covering_rows_cache.get(element.id())
+        if cov_rows is not None:
+            return cov_rows
+
+        cov_rows = []
+        try:
+            for covering in self._covering_index.get(element.id(), []):
+                cov_label = f"Covering_{covering.GlobalId[:8]}"
+                quantities = []
+                for pset_cov in self._psets_by_id.get(covering.id(), ()):
+                    if pset_cov.is_a("IfcElementQuantity") and hasattr(pset_cov, 'Quantities'):
+                        pset_label = f"{pset_cov.Name} (Cov)"
+                        for qty in pset_cov.Quantities:
+                            qty_value = self._get_qty_value(qty)
+                            quantities.append((
+                                pset_label,
+                                getattr(qty, 'Name', 'Unknown'),
+                                str(qty_value) if qty_value is not None else 'N/A'
+                            ))
+                cov_rows.append((cov_label, quantities))
+        except Exception:
+            pass
+
+        self._covering_rows_cache[element.id()] = cov_rows
+        return cov_rows
+
+    def _on_pset_section_open(self, change):
+        """Materialize a pset section's editable rows on first open."""
+        index = change['new']
+        if index is None:
+            return
+        container = change['owner'].children[index]
+        pending = getattr(container, '_pending_rows', None)
+        if pending is None:
+            return
+
+        # The static pset/property name columns render as one HTML table
+        # beside a single VBox of Text inputs: N + 3 widgets per section
+        # instead of 4 per row
+        pset_name, entries = pending
+        label_rows = ["<table style='border-collapse:collapse'>"]
+        text_widgets = []
+        for entry_name, entry_value in entries:
+            label_rows.append(
+                f"<tr style='height:32px'>"
+                f"<td style='min-width:160px'>{pset_name}</td>"
+                f"<td style='min-width:180px'>{entry_name}</td></tr>"
+            )
+            value_widget = widgets.Text(
+                value=entry_value,
+                layout=widgets.Layout(width='200px', height='32px')
+            )
+            value_widget._prop_key = (pset_name, entry_name)
+            value_widget.observe(self._on_prop_value_change, names='value')
+            text_widgets.append(value_widget)
+            self.properties_widgets[(pset_name, entry_name)] = value_widget
+        label_rows.append("</table>")
+
+        container.children = (widgets.HBox([
+            widgets.HTML(''.join(label_rows)),
+            widgets.VBox(text_widgets)
+        ]),)
+        container._pending_rows = None
+
+    def _on_prop_value_change(self, change):
+        """Mark an edited property so saving touches only dirty keys."""
+        self._dirty_props.add(change['owner']._prop_key)
+
+    @staticmethod
+    def _close_widget_tree(children):
+        """Close widgets recursively so their frontend models are freed.
+
+        Replacing a container's children only drops the Python
+        references; without close() every discarded widget stays in the
+        kernel/frontend model map and the page slows over many clicks.
+        """
+        for child in children:
+            HierarchicalTableUI._close_widget_tree(getattr(child, 'children', ()))
+            child.close()
+
     def _show_editable_properties(self, full_name):
         """Create editable property widgets for the selected element."""
         element = self.element_lookup.get(full_name) or self.visualizer.element_map.get(full_name)
         if not element:
+            self._close_widget_tree(self.editable_props_container.children)
             self.editable_props_container.children = [
                 widgets.HTML(f"<b>⚠️ Element not found for: {full_name}</b>")
             ]
             return
-        
+
         self.current_selected_element = element
         self.current_selected_full_name = full_name
         self.properties_widgets.clear()
+        self._dirty_props.clear()
+        self._close_widget_tree(self.editable_props_container.children)
+
+        # Captured here so _save_properties_to_ifc resolves changed pset
+        # names with a dict lookup instead of rebuilding the map per save
+        self._current_psets_by_name = {}
+        for pdef in self._psets_by_id.get(element.id(), ()):
+            name = getattr(pdef, 'Name', None)
+            if name is not None and name not in self._current_psets_by_name:
+                self._current_psets_by_name[name] = pdef
         
         rows = []
         
@@ -382,97 +737,39 @@ class HierarchicalTableUI:
         ])
         rows.append(header_row)
         
-        # Collect properties from all PropertySets and ElementQuantities
-        if hasattr(element, 'IsDefinedBy'):
-            for rel in element.IsDefinedBy:
-                if rel.is_a("IfcRelDefinesByProperties"):
-                    pset = rel.RelatingPropertyDefinition
-                    
-                    # IfcPropertySet (regular properties)
-                    if pset.is_a("IfcPropertySet") and hasattr(pset, 'HasProperties'):
-                        rows.append(widgets.HTML(
-                            f"<hr><b style='color:#4CAF50'>📁 {pset.Name}</b>"
-                        ))
-                        for prop in pset.HasProperties:
-                            if hasattr(prop, 'NominalValue'):
-                                prop_name = getattr(prop, 'Name', 'Unknown')
-                                prop_value = ''
-                                if prop.NominalValue and hasattr(prop.NominalValue, 'wrappedValue'):
-                                    prop_value = prop.NominalValue.wrappedValue
-                                elif prop.NominalValue:
-                                    prop_value = str(prop.NominalValue)
-                                
-                                value_widget = widgets.Text(
-                                    value=str(prop_value),
-                                    layout=widgets.Layout(width='200px')
-                                )
-                                
-                                row = widgets.HBox([
-                                    widgets.Label(value=pset.Name, layout=widgets.Layout(width='160px')),
-                                    widgets.Label(value=prop_name, layout=widgets.Layout(width='180px')),
-                                    value_widget
-                                ])
-                                rows.append(row)
-                                self.properties_widgets[(pset.Name, prop_name)] = value_widget
-                    
-                    # IfcElementQuantity (QTO quantities)
-                    elif pset.is_a("IfcElementQuantity") and hasattr(pset, 'Quantities'):
-                        rows.append(widgets.HTML(
-                            f"<hr><b style='color:#2196F3'>📐 {pset.Name}</b>"
-                        ))
-                        for qty in pset.Quantities:
-                            qty_name = getattr(qty, 'Name', 'Unknown')
-                            qty_value = self._get_qty_value(qty)
-                            
-                            value_widget = widgets.Text(
-                                value=str(qty_value) if qty_value is not None else '',
-                                layout=widgets.Layout(width='200px')
-                            )
-                            
-                            row = widgets.HBox([
-                                widgets.Label(value=pset.Name, layout=widgets.Layout(width='160px')),
-                                widgets.Label(value=qty_name, layout=widgets.Layout(width='180px')),
-                                value_widget
-                            ])
-                            rows.append(row)
-                            self.properties_widgets[(pset.Name, qty_name)] = value_widget
-        
-        # IfcCovering properties for walls
+        # Collect properties from all PropertySets and ElementQuantities,
+        # using the inverted relation index and the per-element row cache.
+        # Each pset is an accordion section whose row widgets only
+        # materialize when the section is first opened — widget creation
+        # per selection drops from O(total props) to O(opened psets).
+        rows_data = self._get_prop_rows(element)
+        if rows_data:
+            pset_accordion = widgets.Accordion(
+                children=[widgets.VBox([]) for _ in rows_data]
+            )
+            for i, (header_html, pset_name, entries) in enumerate(rows_data):
+                pset_accordion.set_title(i, f"{pset_name} ({len(entries)})")
+                pset_accordion.children[i]._pending_rows = (pset_name, entries)
+            pset_accordion.observe(self._on_pset_section_open, names='selected_index')
+            rows.append(pset_accordion)
+        
+        # IfcCovering properties for walls (the covering index already
+        # filters to coverings that carry a Custom_Mesh)
         if element.is_a("IfcWall") or element.is_a("IfcWallStandardCase"):
-            try:
-                for rel in self.model.by_type("IfcRelCoversBldgElements"):
-                    if rel.RelatingBuildingElement == element and rel.RelatedCoverings:
-                        for covering in rel.RelatedCoverings:
-                            if GeometryExtractor.extract_custom_mesh_from_entity(covering):
-                                cov_label = f"Covering_{covering.GlobalId[:8]}"
-                                rows.append(widgets.HTML(
-                                    f"<hr><b style='color:#FF9800'>🧱 IfcCovering: {cov_label}</b>"
-                                ))
-                                if hasattr(covering, 'IsDefinedBy'):
-                                    for rel_cov in covering.IsDefinedBy:
-                                        if rel_cov.is_a("IfcRelDefinesByProperties"):
-                                            pset_cov = rel_cov.RelatingPropertyDefinition
-                                            if pset_cov.is_a("IfcElementQuantity") and hasattr(pset_cov, 'Quantities'):
-                                                for qty in pset_cov.Quantities:
-                                                    qty_name = getattr(qty, 'Name', 'Unknown')
-                                                    qty_value = self._get_qty_value(qty)
-                                                    row = widgets.HBox([
-                                                        widgets.Label(
-                                                            value=f"{pset_cov.Name} (Cov)",
-                                                            layout=widgets.Layout(width='160px')
-                                                        ),
-                                                        widgets.Label(
-                                                            value=qty_name,
-                                                            layout=widgets.Layout(width='180px')
-                                                        ),
-                                                        widgets.Label(
-                                                            value=str(qty_value) if qty_value is not None else 'N/A',
-                                                            layout=widgets.Layout(width='200px')
-                                                        )
-                                                    ])
-                                                    rows.append(row)
-            except Exception:
-                pass
+            for cov_label, quantities in self._get_covering_rows(element):
+                # Read-only covering rows collapse into one HTML widget
+                parts = [
+                    f"<hr><b style='color:#FF9800'>🧱 IfcCovering: {cov_label}</b>",
+                    "<table style='border-collapse:collapse'>"
+                ]
+                for pset_label, qty_name, qty_value in quantities:
+                    parts.append(
+                        f"<tr><td style='min-width:160px'>{pset_label}</td>"
+                        f"<td style='min-width:180px'>{qty_name}</td>"
+                        f"<td style='min-width:200px'>{qty_value}</td></tr>"
+                    )
+                parts.append("</table>")
+                rows.append(widgets.HTML(''.join(parts)))
         
         # ---- Add New Property Section ----
         rows.append(widgets.HTML("<hr><b>➕ Add New Property:</b>"))
@@ -504,8 +801,11 @@ class HierarchicalTableUI:
         ])
         rows.append(new_prop_row)
         
-        # Container for dynamically added new properties
-        self.new_props_container = widgets.VBox()
+        # Container for dynamically added new properties; rows are
+        # display()-ed into the Output so each add is an append, not a
+        # rewrite of the container's children tuple
+        self._new_props_output = widgets.Output()
+        self.new_props_container = widgets.VBox([self._new_props_output])
         rows.append(self.new_props_container)
         
         # ---- Save Buttons ----
@@ -550,18 +850,13 @@ class HierarchicalTableUI:
     
     @staticmethod
     def _get_qty_value(qty):
-        """Extract value from an IFC quantity."""
-        if qty.is_a('IfcQuantityLength'):
-            return getattr(qty, 'LengthValue', None)
-        elif qty.is_a('IfcQuantityArea'):
-            return getattr(qty, 'AreaValue', None)
-        elif qty.is_a('IfcQuantityVolume'):
-            return getattr(qty, 'VolumeValue', None)
-        elif qty.is_a('IfcQuantityCount'):
-            return getattr(qty, 'CountValue', None)
-        elif qty.is_a('IfcQuantityWeight'):
-            return getattr(qty, 'WeightValue', None)
-        return None
+        """Extract value from an IFC quantity.
+
+        One is_a() call plus a dict lookup instead of up to five schema
+        type tests per quantity.
+        """
+        attr = _QTY_ATTR.get(qty.is_a())
+        return getattr(qty, attr, None) if attr else None
 
     def _add_new_property_row(self, b):
         """Add a new property entry to the editable list."""
@@ -583,9 +878,13 @@ class HierarchicalTableUI:
             )
             return
         
-        # Create editable row
+        # Create editable row; brand-new properties don't exist in the
+        # model yet, so they are dirty from the start
         value_widget = widgets.Text(value=prop_value, layout=widgets.Layout(width='200px'))
+        value_widget._prop_key = (pset_name, prop_name)
+        value_widget.observe(self._on_prop_value_change, names='value')
         self.properties_widgets[(pset_name, prop_name)] = value_widget
+        self._dirty_props.add((pset_name, prop_name))
         
         new_row = widgets.HBox([
             widgets.Label(value=pset_name, layout=widgets.Layout(width='160px')),
@@ -594,11 +893,11 @@ class HierarchicalTableUI:
             widgets.HTML("<span style='color:green; margin-left:5px'>✨ New</span>")
         ])
         
-        # Add to new props container
-        current_children = list(self.new_props_container.children)
-        current_children.append(new_row)
-        self.new_props_container.children = current_children
-        
+        # Rows display incrementally into the Output widget: appending
+        # does not rewrite (and re-sync) the whole children tuple
+        with self._new_props_output:
+            display(new_row)
+
         # Clear inputs
         self.new_pset_input.value = ""
         self.new_prop_name_input.value = ""
@@ -622,28 +921,30 @@ class HierarchicalTableUI:
         element = self.current_selected_element
         
         try:
-            import ifcopenshell
-            import ifcopenshell.guid
-            
-            # Group all property widgets by PropertySet name
+            # Group only edited widgets by PropertySet name; untouched
+            # properties never reach the IFC write path
             changes_by_pset = defaultdict(dict)
-            for (pset_name, prop_name), widget in self.properties_widgets.items():
-                changes_by_pset[pset_name][prop_name] = widget.value
+            for key in self._dirty_props:
+                widget = self.properties_widgets.get(key)
+                if widget is not None:
+                    pset_name, prop_name = key
+                    changes_by_pset[pset_name][prop_name] = widget.value
+
+            if not changes_by_pset:
+                self.save_status.value = (
+                    "<span style='color:orange'>⚠️ No edited properties to save</span>"
+                )
+                return
             
             modified_count = 0
             added_count = 0
-            
+
+            # Name -> pset map captured when the element was shown
+            psets_by_name = self._current_psets_by_name
+
             for pset_name, props in changes_by_pset.items():
-                # Try to find an existing PropertySet or ElementQuantity
-                existing_pset = None
-                if hasattr(element, 'IsDefinedBy'):
-                    for rel in element.IsDefinedBy:
-                        if rel.is_a("IfcRelDefinesByProperties"):
-                            pdef = rel.RelatingPropertyDefinition
-                            if hasattr(pdef, 'Name') and pdef.Name == pset_name:
-                                existing_pset = pdef
-                                break
-                
+                existing_pset = psets_by_name.get(pset_name)
+
                 if existing_pset:
                     if existing_pset.is_a("IfcPropertySet"):
                         # Update existing PropertySet
@@ -652,8 +953,8 @@ class HierarchicalTableUI:
                             existing_prop_dict = {
                                 p.Name: p for p in existing_pset.HasProperties if hasattr(p, 'Name')
                             }
-                        new_props_list = list(existing_pset.HasProperties) if hasattr(existing_pset, 'HasProperties') else []
-                        
+                        to_add = []
+
                         for prop_name, new_value_str in props.items():
                             if prop_name in existing_prop_dict:
                                 # Update existing property
@@ -673,10 +974,15 @@ class HierarchicalTableUI:
                                 new_prop = self.model.createIfcPropertySingleValue(
                                     prop_name, None, new_value, None
                                 )
-                                new_props_list.append(new_prop)
+                                to_add.append(new_prop)
                                 added_count += 1
-                        
-                        existing_pset.HasProperties = tuple(new_props_list)
+
+                        # One HasProperties write per pset, and only when
+                        # something was actually added: in-place value
+                        # edits must not pay inverse-map maintenance
+                        if to_add:
+                            existing = existing_pset.HasProperties if hasattr(existing_pset, 'HasProperties') else ()
+                            existing_pset.HasProperties = tuple(existing) + tuple(to_add)
                     
                     elif existing_pset.is_a("IfcElementQuantity"):
                         # Update existing ElementQuantity values
@@ -691,26 +997,16 @@ class HierarchicalTableUI:
                                 qty = existing_qty_dict[prop_name]
                                 try:
                                     new_val = float(new_value_str)
-                                    if qty.is_a('IfcQuantityLength'):
-                                        qty.LengthValue = new_val
-                                    elif qty.is_a('IfcQuantityArea'):
-                                        qty.AreaValue = new_val
-                                    elif qty.is_a('IfcQuantityVolume'):
-                                        qty.VolumeValue = new_val
-                                    elif qty.is_a('IfcQuantityCount'):
-                                        qty.CountValue = new_val
-                                    elif qty.is_a('IfcQuantityWeight'):
-                                        qty.WeightValue = new_val
+                                    attr = _QTY_ATTR.get(qty.is_a())
+                                    if attr:
+                                        setattr(qty, attr, new_val)
                                     modified_count += 1
                                 except ValueError:
                                     pass  # Skip non-numeric values for quantities
                 else:
                     # Create a brand-new PropertySet for properties not yet in any pset
-                    owner_history = None
-                    oh_list = self.model.by_type("IfcOwnerHistory")
-                    if oh_list:
-                        owner_history = oh_list[0]
-                    
+                    owner_history = self._owner_history
+
                     new_ifc_props = []
                     for prop_name, prop_value in props.items():
                         new_value = self.model.createIfcText(prop_value)
@@ -737,14 +1033,22 @@ class HierarchicalTableUI:
                             [element],
                             new_pset
                         )
-            
+                        # Keep the inverted relation index and the
+                        # per-selection name map in sync
+                        self._psets_by_id[element.id()].append(new_pset)
+                        self._current_psets_by_name.setdefault(pset_name, new_pset)
+
             self.save_status.value = (
                 f"<span style='color:green'>✅ Saved! Modified: <b>{modified_count}</b>, "
                 f"Added: <b>{added_count}</b> properties for element "
                 f"<b>{element.GlobalId[:12]}</b></span>"
             )
             
-            # Refresh the properties display to show current state
+            # Refresh the properties display and cached QTO rows so the
+            # table reflects the edited values
+            self._dirty_props.clear()
+            self._prop_rows_cache.pop(element.id(), None)
+            self._refresh_qto_record(element)
             self._show_editable_properties(self.current_selected_full_name)
         
         except Exception as e:
@@ -752,46 +1056,77 @@ class HierarchicalTableUI:
             import traceback
             traceback.print_exc()
 
+    def _refresh_qto_record(self, element):
+        """Re-derive a saved element's cached QTO values in place.
+
+        The extraction records hold the qto_props dicts the table and
+        button list render from; without this, edited quantities would
+        keep showing their pre-save values for the rest of the session.
+        """
+        full_name = self._full_name_by_id.get(element.id())
+        rec = self._records_by_full_name.get(full_name) if full_name else None
+        if rec is None:
+            return
+
+        # The dict is shared by every record index, so updating it in
+        # place refreshes _elements_flat too
+        qto_props = rec.qto_props
+        qto_props.clear()
+        for pset in self._psets_by_id.get(element.id(), ()):
+            name = getattr(pset, 'Name', None)
+            if name and name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                GeometryExtractor._extract_quantities(pset, qto_props)
+        if element.is_a("IfcWall") or element.is_a("IfcWallStandardCase"):
+            for covering in self._covering_index.get(element.id(), []):
+                for pset in self._psets_by_id.get(covering.id(), ()):
+                    name = getattr(pset, 'Name', None)
+                    if name and name.startswith("Qto_") and pset.is_a("IfcElementQuantity"):
+                        GeometryExtractor._extract_quantities(pset, qto_props, suffix="_Covering")
+
+        self._table_data_cache.clear()
+        if self._table_content is not None:
+            self._refresh_table_content()
+
+    # Value type name -> string coercion; built once at class scope so a
+    # save doesn't allocate a fresh dict of closures per property
+    _IFC_VALUE_COERCE = {
+        "IfcText": str,
+        "IfcLabel": str,
+        "IfcIdentifier": str,
+        "IfcReal": float,
+        "IfcInteger": int,
+        "IfcBoolean": lambda v: v.lower() in ('true', '1', 'yes'),
+        "IfcLengthMeasure": float,
+        "IfcAreaMeasure": float,
+        "IfcVolumeMeasure": float,
+        "IfcCountMeasure": float,
+        "IfcMassMeasure": float,
+        "IfcPositiveLengthMeasure": float,
+        "IfcPlaneAngleMeasure": float,
+        "IfcThermalTransmittanceMeasure": float,
+    }
+
     def _create_ifc_value_by_type(self, ifc_type, value_str):
         """
         Create an IFC value entity matching the original type.
-        
+
         Parameters:
         -----------
         ifc_type : str
             The IFC type name (e.g., 'IfcText', 'IfcReal')
         value_str : str
             The string representation of the value
-            
+
         Returns:
         --------
         IFC value entity or None
         """
         try:
-            type_map = {
-                "IfcText": lambda v: self.model.createIfcText(v),
-                "IfcLabel": lambda v: self.model.createIfcLabel(v),
-                "IfcIdentifier": lambda v: self.model.createIfcIdentifier(v),
-                "IfcReal": lambda v: self.model.createIfcReal(float(v)),
-                "IfcInteger": lambda v: self.model.createIfcInteger(int(v)),
-                "IfcBoolean": lambda v: self.model.createIfcBoolean(v.lower() in ('true', '1', 'yes')),
-                "IfcLengthMeasure": lambda v: self.model.createIfcLengthMeasure(float(v)),
-                "IfcAreaMeasure": lambda v: self.model.createIfcAreaMeasure(float(v)),
-                "IfcVolumeMeasure": lambda v: self.model.createIfcVolumeMeasure(float(v)),
-                "IfcCountMeasure": lambda v: self.model.createIfcCountMeasure(float(v)),
-                "IfcMassMeasure": lambda v: self.model.createIfcMassMeasure(float(v)),
-                "IfcPositiveLengthMeasure": lambda v: self.model.createIfcPositiveLengthMeasure(float(v)),
-                "IfcPlaneAngleMeasure": lambda v: self.model.createIfcPlaneAngleMeasure(float(v)),
-                "IfcThermalTransmittanceMeasure": lambda v: self.model.createIfcThermalTransmittanceMeasure(float(v)),
-            }
-            
-            creator = type_map.get(ifc_type)
-            if creator:
-                return creator(value_str)
-            else:
-                # Default fallback: try IfcText
-                return self.model.createIfcText(value_str)
-        
+            coerce = self._IFC_VALUE_COERCE.get(ifc_type)
+            if coerce is not None:
+                return getattr(self.model, f"create{ifc_type}")(coerce(value_str))
+            # Default fallback: try IfcText
+            return self.model.createIfcText(value_str)
         except (ValueError, TypeError):
             return self.model.createIfcText(value_str)
 
@@ -827,106 +1162,161 @@ class HierarchicalTableUI:
 
     def _create_table(self):
         """Create the interactive overview table with QTO properties."""
+        # Re-applying the same storey/type/search combination reuses the
+        # previously built columns; only the page slice is rewritten
+        cache_key = (self.filter_storey, self.filter_ifc_type, self._table_search)
+        cached = self._table_data_cache.get(cache_key)
+        if cached is not None:
+            self._table_header, self._table_full_cells, self._table_row_colors = cached
+            self._ensure_table_widgets()
+            self._apply_table_page()
+            return self._table_container
+
+        # Single pass over the cached records: the fixed columns and the
+        # master QTO key set accumulate together, then the QTO columns
+        # are emitted from the kept per-row qto_props references — no
+        # separate key-collection traversal and no per-type set union
         header_values = ["Storey", "Type", "Name", "GUID"]
-        
-        # Collect all QTO keys
-        qto_keys_by_type = defaultdict(set)
-        for storey_name, types in self.hierarchy.items():
-            if self.filter_storey and self.filter_storey != 'All' and storey_name != self.filter_storey:
-                continue
-            for ifc_type, elements in types.items():
-                if self.filter_ifc_type and self.filter_ifc_type != 'All' and ifc_type != self.filter_ifc_type:
-                    continue
-                for element in elements:
-                    if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                        qto_props = GeometryExtractor.extract_qto_properties(element, self.model)
-                        qto_keys_by_type[ifc_type].update(qto_props.keys())
-        
-        qto_keys = sorted(set().union(*qto_keys_by_type.values())) if qto_keys_by_type else []
-        
-        if qto_keys:
-            header_values.extend(qto_keys)
-        
-        # Build table data
-        cells_values = [[] for _ in header_values]
-        row_colors = []
-        current_row = 0
-        
-        for storey_name, types in self.hierarchy.items():
-            if self.filter_storey and self.filter_storey != 'All' and storey_name != self.filter_storey:
-                continue
-            for ifc_type, elements in types.items():
-                if self.filter_ifc_type and self.filter_ifc_type != 'All' and ifc_type != self.filter_ifc_type:
+        fixed_columns = [[] for _ in header_values]
+        row_qto_props = []
+        master_qto_keys = set()
+        search = self._table_search.lower()
+
+        for storey_name, ifc_type, element, element_name, full_name, qto_props in self._iter_filtered_elements():
+            if full_name in self.visualizer.mesh_dict:
+                if search and search not in element_name.lower() and search not in element.GlobalId.lower():
                     continue
-                for element in elements:
-                    if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                        element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
-                        full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                        
-                        if full_name in self.visualizer.mesh_dict:
-                            cells_values[0].append(storey_name)
-                            cells_values[1].append(ifc_type)
-                            cells_values[2].append(element_name)
-                            cells_values[3].append(element.GlobalId[:8])
-                            
-                            qto_props = GeometryExtractor.extract_qto_properties(element, self.model)
-                            for key in qto_keys:
-                                value = qto_props.get(key, "-")
-                                cells_values[header_values.index(key)].append(str(value))
-                            
-                            row_colors.append("#ffffff" if current_row % 2 == 0 else "#f0f0f0")
-                            current_row += 1
-        
-        if not cells_values[0]:
-            return go.FigureWidget(data=[go.Table(
-                header=dict(values=["Message"], fill_color='#FF5733', font=dict(color='white')),
-                cells=dict(values=[["No element matches the filters."]], align='center')
-            )])
-        
-        # Create table as FigureWidget for click interactivity
-        table_fig = go.FigureWidget(data=[go.Table(
-            header=dict(
-                values=header_values,
-                fill_color='#4CAF50',
-                font=dict(color='white', size=12),
-                align='left'
-            ),
-            cells=dict(
-                values=cells_values,
-                fill_color=[row_colors],
-                align='left',
-                height=30
-            )
-        )])
-        
-        table_fig.update_layout(
+                fixed_columns[0].append(storey_name)
+                fixed_columns[1].append(ifc_type)
+                fixed_columns[2].append(element_name)
+                fixed_columns[3].append(element.GlobalId[:8])
+                row_qto_props.append(qto_props)
+                master_qto_keys.update(qto_props.keys())
+
+        qto_keys = sorted(master_qto_keys)
+        header_values.extend(qto_keys)
+        cells_values = fixed_columns + [
+            [str(props.get(key, "-")) for props in row_qto_props]
+            for key in qto_keys
+        ]
+
+        n_rows = len(cells_values[0])
+        self._table_header = header_values
+        self._table_full_cells = cells_values
+        self._table_row_colors = ["#ffffff" if i % 2 == 0 else "#f0f0f0" for i in range(n_rows)]
+
+        if len(self._table_data_cache) >= 8:
+            self._table_data_cache.pop(next(iter(self._table_data_cache)))
+        self._table_data_cache[cache_key] = (
+            self._table_header, self._table_full_cells, self._table_row_colors
+        )
+
+        self._ensure_table_widgets()
+        self._apply_table_page()
+        return self._table_container
+
+    def _ensure_table_widgets(self):
+        """Create the table FigureWidget and its paging controls once."""
+        if self._table_container is not None:
+            return
+
+        # Later refreshes only rewrite this figure's header/cells in place
+        self._table_fig = go.FigureWidget(data=[go.Table()])
+        self._table_fig.update_layout(
             width=800,
             height=400,
             margin=dict(l=0, r=0, t=20, b=0)
         )
-        
-        # Table click handler (may not work in all environments)
-        def on_table_click(trace, points, selector):
-            if points.point_inds:
-                row_index = points.point_inds[0]
-                if row_index < len(cells_values[0]):
-                    full_name = (
-                        f"{cells_values[0][row_index]}/{cells_values[1][row_index]}/"
-                        f"{cells_values[2][row_index]}"
-                    )
-                    # Update dropdown
-                    self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
-                    if full_name in [opt for opt in self.element_selector.options]:
-                        self.element_selector.value = full_name
-                    self.element_selector.observe(self._on_element_dropdown_change, names='value')
-                    self._select_mesh(full_name)
-        
         try:
-            table_fig.data[0].on_click(on_table_click)
+            self._table_fig.data[0].on_click(self._on_table_click)
         except Exception:
             pass  # Click handler may not work in all environments
-        
-        return table_fig
+
+        self._table_search_box = widgets.Text(
+            placeholder='Search Name/GUID...',
+            continuous_update=False,
+            layout=widgets.Layout(width='200px')
+        )
+        self._table_search_box.observe(self._on_table_search, names='value')
+
+        self._table_prev_btn = widgets.Button(description='◀ Prev', layout=widgets.Layout(width='80px'))
+        self._table_next_btn = widgets.Button(description='Next ▶', layout=widgets.Layout(width='80px'))
+        self._table_prev_btn.on_click(lambda b: self._change_table_page(-1))
+        self._table_next_btn.on_click(lambda b: self._change_table_page(1))
+        self._table_page_label = widgets.Label()
+
+        self._table_container = widgets.VBox([
+            widgets.HBox([
+                self._table_search_box,
+                self._table_prev_btn,
+                self._table_page_label,
+                self._table_next_btn
+            ]),
+            self._table_fig
+        ])
+
+    def _apply_table_page(self):
+        """Show the current page by rewriting only the table's cells."""
+        full_cells = self._table_full_cells
+        n_rows = len(full_cells[0]) if full_cells else 0
+        max_page = max((n_rows - 1) // self._page_size, 0)
+        self._page = min(max(self._page, 0), max_page)
+        start = self._page * self._page_size
+        end = start + self._page_size
+
+        if n_rows == 0:
+            self._table_cells = None
+            header = dict(values=["Message"], fill_color='#FF5733', font=dict(color='white'))
+            cells = dict(values=[["No element matches the filters."]], align='center')
+        else:
+            self._table_cells = [column[start:end] for column in full_cells]
+            header = dict(
+                values=self._table_header,
+                fill_color='#4CAF50',
+                font=dict(color='white', size=12),
+                align='left'
+            )
+            cells = dict(
+                values=self._table_cells,
+                fill_color=[self._table_row_colors[start:end]],
+                align='left',
+                height=30
+            )
+
+        with self._table_fig.batch_update():
+            self._table_fig.data[0].header.update(header)
+            self._table_fig.data[0].cells.update(cells)
+
+        self._table_page_label.value = f"Page {self._page + 1}/{max_page + 1} ({n_rows} rows)"
+        self._table_prev_btn.disabled = self._page == 0
+        self._table_next_btn.disabled = self._page >= max_page
+
+    def _change_table_page(self, step):
+        """Move one page; only re-slices the cached column data."""
+        self._page += step
+        self._apply_table_page()
+
+    def _on_table_search(self, change):
+        """Re-filter the cached rows on a Name/GUID substring match."""
+        self._table_search = change['new']
+        self._page = 0
+        self._create_table()
+
+    def _on_table_click(self, trace, points, selector):
+        """Select the element behind a clicked table row."""
+        if points.point_inds and self._table_cells:
+            row_index = points.point_inds[0]
+            if row_index < len(self._table_cells[0]):
+                full_name = (
+                    f"{self._table_cells[0][row_index]}/{self._table_cells[1][row_index]}/"
+                    f"{self._table_cells[2][row_index]}"
+                )
+                # Update dropdown
+                self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
+                if full_name in self._selector_options_set:
+                    self.element_selector.value = full_name
+                self.element_selector.observe(self._on_element_dropdown_change, names='value')
+                self._select_mesh(full_name)
     
     def _create_interactive_element_list(self):
         """Create an interactive list of elements with selection buttons.
@@ -934,56 +1324,45 @@ class HierarchicalTableUI:
         This is an alternative to the Plotly table that works better in Google Colab.
         """
         items = []
-        
-        for storey_name, types in self.hierarchy.items():
-            if self.filter_storey and self.filter_storey != 'All' and storey_name != self.filter_storey:
-                continue
-            for ifc_type, elements in types.items():
-                if self.filter_ifc_type and self.filter_ifc_type != 'All' and ifc_type != self.filter_ifc_type:
-                    continue
-                for element in elements:
-                    if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                        element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
-                        full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                        
-                        if full_name in self.visualizer.mesh_dict:
-                            # Create a select button for this element
-                            btn = widgets.Button(
-                                description='Select',
-                                button_style='',
-                                layout=widgets.Layout(width='70px', height='25px')
-                            )
-                            
-                            # Create closure for the button callback
-                            def make_callback(fn):
-                                def callback(b):
-                                    self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
-                                    if fn in list(self.element_selector.options):
-                                        self.element_selector.value = fn
-                                    self.element_selector.observe(self._on_element_dropdown_change, names='value')
-                                    self._select_mesh(fn)
-                                return callback
-                            
-                            btn.on_click(make_callback(full_name))
-                            
-                            # Create row with element info and button
-                            qto_props = GeometryExtractor.extract_qto_properties(element, self.model)
-                            qto_str = ', '.join([f"{k}: {v:.2f}" if isinstance(v, float) else f"{k}: {v}" 
-                                                for k, v in list(qto_props.items())[:3]])
-                            
-                            row = widgets.HBox([
-                                btn,
-                                widgets.HTML(
-                                    f"<small><b>{element_name}</b> | {ifc_type} | {storey_name}</small>",
-                                    layout=widgets.Layout(width='350px')
-                                ),
-                                widgets.HTML(
-                                    f"<small style='color:#666'>{qto_str[:60]}...</small>" if qto_str else "",
-                                    layout=widgets.Layout(width='200px')
-                                )
-                            ], layout=widgets.Layout(margin='2px 0', padding='3px', 
-                                                    border_bottom='1px solid #eee'))
-                            items.append(row)
+
+        for storey_name, ifc_type, element, element_name, full_name, qto_props in self._iter_filtered_elements():
+            if full_name in self.visualizer.mesh_dict:
+                # Create a select button for this element
+                btn = widgets.Button(
+                    description='Select',
+                    button_style='',
+                    layout=widgets.Layout(width='70px', height='25px')
+                )
+
+                # Create closure for the button callback
+                def make_callback(fn):
+                    def callback(b):
+                        self.element_selector.unobserve(self._on_element_dropdown_change, names='value')
+                        if fn in self._selector_options_set:
+                            self.element_selector.value = fn
+                        self.element_selector.observe(self._on_element_dropdown_change, names='value')
+                        self._select_mesh(fn)
+                    return callback
+
+                btn.on_click(make_callback(full_name))
+
+                # Create row with element info and button
+                qto_str = ', '.join([f"{k}: {v:.2f}" if isinstance(v, float) else f"{k}: {v}"
+                                    for k, v in list(qto_props.items())[:3]])
+
+                row = widgets.HBox([
+                    btn,
+                    widgets.HTML(
+                        f"<small><b>{element_name}</b> | {ifc_type} | {storey_name}</small>",
+                        layout=widgets.Layout(width='350px')
+                    ),
+                    widgets.HTML(
+                        f"<small style='color:#666'>{qto_str[:60]}...</small>" if qto_str else "",
+                        layout=widgets.Layout(width='200px')
+                    )
+                ], layout=widgets.Layout(margin='2px 0', padding='3px',
+                                        border_bottom='1px solid #eee'))
+                items.append(row)
         
         if not items:
             return widgets.HTML("<i>No elements match the current filters</i>")
@@ -1001,41 +1380,49 @@ class HierarchicalTableUI:
 
     def _update_table(self):
         """Update the table display.
-        
+
         Uses interactive button list by default (works better in Google Colab)
-        with Plotly table available as alternative.
+        with Plotly table available as alternative. The toggle and content
+        container are created once and refreshed in place, so filter changes
+        don't tear down and re-render the whole table area.
         """
-        with self.table_output:
-            self.table_output.clear_output()
-            
+        if self._table_view_toggle is None:
             # Create toggle for view type
-            use_buttons = widgets.Checkbox(
+            self._table_view_toggle = widgets.Checkbox(
                 value=True,  # Default to button list (better Colab support)
                 description='Use Button List (Colab-friendly)',
                 indent=False,
                 layout=widgets.Layout(width='250px')
             )
-            
-            content_container = widgets.Output()
-            
-            def update_view(change):
-                with content_container:
-                    content_container.clear_output()
-                    if use_buttons.value:
-                        display(self._create_interactive_element_list())
-                    else:
-                        display(self._create_table())
-            
-            use_buttons.observe(update_view, names='value')
-            
-            # Show toggle and initial content
-            display(widgets.VBox([
-                use_buttons,
-                content_container
-            ]))
-            
-            # Trigger initial display
-            update_view(None)
+            self._table_content = widgets.Output()
+            self._table_view_toggle.observe(self._refresh_table_content, names='value')
+
+            # Show toggle and content container exactly once
+            with self.table_output:
+                self.table_output.clear_output()
+                display(widgets.VBox([
+                    self._table_view_toggle,
+                    self._table_content
+                ]))
+
+        self._refresh_table_content()
+
+    def _refresh_table_content(self, change=None):
+        """Redraw only the inner table/button-list content."""
+        new_list = None
+        with self._table_content:
+            self._table_content.clear_output()
+            if self._table_view_toggle.value:
+                new_list = self._create_interactive_element_list()
+                display(new_list)
+            else:
+                display(self._create_table())
+        # The button list is rebuilt per refresh; close the replaced
+        # tree so its widget models don't pile up across redraws. The
+        # Plotly container persists and must never be closed.
+        if self._button_list_box is not None:
+            self._close_widget_tree((self._button_list_box,))
+        self._button_list_box = new_list
 
     def _update_viewer(self):
         """Update the 3D viewer (only needed for non-FigureWidget fallback)."""
@@ -1059,43 +1446,59 @@ class HierarchicalTableUI:
         self.filter_ifc_type = self.ifc_type_dropdown.value
         
         print(f"🔍 Applying filters: Storey={self.filter_storey}, IFC Type={self.filter_ifc_type}")
-        
-        # Update visibility based on filters
+
+        # Intersect the precomputed per-storey/per-type name sets instead
+        # of re-deriving storey and type from every mesh name; the result
+        # is cached per filter pair for repeated toggles
+        all_names = self.visualizer.mesh_dict.keys()
+        cache_key = (self.filter_storey, self.filter_ifc_type)
+        visible_set = self._filter_cache.get(cache_key)
+        if visible_set is None:
+            storey_set = (
+                all_names if self.filter_storey == 'All'
+                else self._meshes_by_storey.get(self.filter_storey, set())
+            )
+            type_set = (
+                all_names if self.filter_ifc_type == 'All'
+                else self._meshes_by_type.get(self.filter_ifc_type, set())
+            )
+            visible_set = frozenset(set(storey_set) & set(type_set))
+            self._filter_cache[cache_key] = visible_set
+
+        # Only names whose visibility actually flips are touched; diffing
+        # against the live visibility dict also covers changes made via
+        # the section selectors since the last apply
+        changed = {
+            full_name for full_name in all_names
+            if self.visualizer.visibility.get(full_name, True) != (full_name in visible_set)
+        }
+
+        for full_name in changed:
+            self.visualizer.visibility[full_name] = full_name in visible_set
+
+        # Sync the section selectors without firing a render per widget
+        self._suppress_observer = True
+        try:
+            for selector in self._section_selectors:
+                selector.value = tuple(
+                    value for _, value in selector.options if value in visible_set
+                )
+        finally:
+            self._suppress_observer = False
+
         if self.visualizer._is_figure_widget:
             with self.visualizer.fig.batch_update():
-                for full_name in self.visualizer.mesh_dict:
-                    parts = full_name.split('/')
-                    storey = parts[0] if len(parts) > 0 else ''
-                    ifc_type = parts[1] if len(parts) > 1 else ''
-                    is_visible = (
-                        (self.filter_storey == 'All' or storey == self.filter_storey) and
-                        (self.filter_ifc_type == 'All' or ifc_type == self.filter_ifc_type)
-                    )
-                    self.visualizer.visibility[full_name] = is_visible
-                    
-                    # Update trace visibility
-                    for trace in self.visualizer.fig.data:
-                        if trace.name == full_name:
-                            trace.visible = is_visible
-                            break
-                    
-                    if full_name in self.all_checkboxes:
-                        self.all_checkboxes[full_name].value = is_visible
+                for full_name in changed:
+                    idx = self._trace_index.get(full_name)
+                    if idx is not None:
+                        self.visualizer.fig.data[idx].visible = full_name in visible_set
         else:
-            for full_name in self.visualizer.mesh_dict:
-                parts = full_name.split('/')
-                storey = parts[0] if len(parts) > 0 else ''
-                ifc_type = parts[1] if len(parts) > 1 else ''
-                is_visible = (
-                    (self.filter_storey == 'All' or storey == self.filter_storey) and
-                    (self.filter_ifc_type == 'All' or ifc_type == self.filter_ifc_type)
-                )
-                self.visualizer.visibility[full_name] = is_visible
-                self.visualizer.mesh_dict[full_name].visible = is_visible
-                
-                if full_name in self.all_checkboxes:
-                    self.all_checkboxes[full_name].value = is_visible
-        
+            for full_name in changed:
+                mesh = self.visualizer.mesh_dict.get(full_name)
+                if mesh is not None:
+                    mesh.visible = full_name in visible_set
+
+
         self._update_table()
         self._update_element_selector()
         print("✅ 3D view, table, and element selector updated")
@@ -1105,137 +1508,166 @@ class HierarchicalTableUI:
     # -------------------------------------------------------------------------
 
     def _create_visibility_accordion(self):
-        """Create the hierarchical visibility control accordion."""
+        """Create the hierarchical visibility control accordion.
+
+        Checkbox widgets dominate UI build time on large models, so each
+        type section starts as an empty VBox carrying its element list;
+        the checkboxes materialize the first time that section is
+        expanded. Widget creation drops from O(elements) to
+        O(expanded-section elements).
+        """
         visibility_accordion = widgets.Accordion(children=[])
         visibility_titles = []
-        
+        # Flat list of every accordion so expand/collapse-all can walk
+        # it directly instead of recursing through the widget tree
+        self._all_accordions = [visibility_accordion]
+        self._section_selectors = []
+
         for storey_name, types in self.hierarchy.items():
             if self.filter_storey and self.filter_storey != 'All' and storey_name != self.filter_storey:
                 continue
-            
+
             type_accordion = widgets.Accordion(children=[])
             type_titles = []
-            
+
             for ifc_type, elements in types.items():
                 if self.filter_ifc_type and self.filter_ifc_type != 'All' and ifc_type != self.filter_ifc_type:
                     continue
-                
-                element_checkboxes = []
+
+                pending_elements = []
                 for element in elements:
-                    if GeometryExtractor.extract_custom_mesh_from_entity(element):
-                        element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
+                    full_name = self._full_name_by_id.get(element.id())
+                    if full_name is None:
+                        # Background extraction may not have reached this
+                        # element yet; mesh_dict membership below still
+                        # filters correctly
+                        element_name = self._element_name(element)
                         full_name = f"{storey_name}/{ifc_type}/{element_name}"
-                        
-                        if full_name in self.visualizer.mesh_dict:
-                            checkbox = widgets.Checkbox(
-                                value=self.visualizer.visibility.get(full_name, True),
-                                description=element_name,
-                                indent=False,
-                                layout=widgets.Layout(width='auto')
-                            )
-                            checkbox.full_name = full_name
-                            checkbox.observe(self._on_checkbox_change, names="value")
-                            element_checkboxes.append(checkbox)
-                            self.all_checkboxes[full_name] = checkbox
-                
-                if element_checkboxes:
-                    select_all_checkbox = widgets.Checkbox(
-                        value=True,
-                        description=f"Select all ({len(element_checkboxes)} elements)",
-                        indent=False,
-                        style={'font_weight': 'bold'}
-                    )
-                    select_all_checkbox.related_checkboxes = element_checkboxes
-                    select_all_checkbox.observe(self._on_select_all_change, names="value")
-                    
-                    type_container = widgets.VBox([
-                        select_all_checkbox,
-                        widgets.HTML("<hr style='margin: 5px 0;'>"),
-                        *element_checkboxes
-                    ])
-                    
+                    else:
+                        element_name = full_name.rsplit('/', 1)[-1]
+                    if full_name in self.visualizer.mesh_dict:
+                        pending_elements.append((full_name, element_name))
+
+                if pending_elements:
+                    type_container = widgets.VBox([])
+                    type_container._pending_elements = pending_elements
+
                     type_accordion.children += (type_container,)
-                    type_titles.append(f"{ifc_type} ({len(element_checkboxes)})")
-            
+                    type_titles.append(f"{ifc_type} ({len(pending_elements)})")
+
             if type_accordion.children:
                 for i, title in enumerate(type_titles):
                     type_accordion.set_title(i, title)
+                type_accordion.observe(self._on_type_section_open, names='selected_index')
+                self._all_accordions.append(type_accordion)
                 visibility_accordion.children += (type_accordion,)
                 visibility_titles.append(f"{storey_name} ({len(type_titles)} types)")
-        
+
         for i, title in enumerate(visibility_titles):
             visibility_accordion.set_title(i, title)
-        
+
         return visibility_accordion
 
-    def _on_checkbox_change(self, change):
-        """Handle individual checkbox changes."""
-        checkbox = change['owner']
-        full_name = checkbox.full_name
-        is_visible = change['new']
-        
-        self.visualizer.visibility[full_name] = is_visible
-        
+    def _on_type_section_open(self, change):
+        """Materialize a section's controls when it is first expanded."""
+        index = change['new']
+        if index is None:
+            return
+        self._materialize_section(change['owner'].children[index])
+
+    def _materialize_section(self, container):
+        """Build the visibility controls for one type section, once.
+
+        Each section is a single SelectMultiple over its element names
+        instead of one Checkbox per element — one widget and one
+        observer per section rather than per element.
+        """
+        pending_elements = getattr(container, '_pending_elements', None)
+        if not pending_elements:
+            return
+
+        options = [(element_name, full_name) for full_name, element_name in pending_elements]
+        visible = tuple(
+            full_name for full_name, _ in pending_elements
+            if self.visualizer.visibility.get(full_name, True)
+        )
+        selector = widgets.SelectMultiple(
+            options=options,
+            value=visible,
+            rows=min(10, len(options)),
+            layout=widgets.Layout(width='auto')
+        )
+        selector.observe(self._on_visibility_select_change, names='value')
+        self._section_selectors.append(selector)
+
+        select_all_checkbox = widgets.Checkbox(
+            value=len(visible) == len(options),
+            description=f"Select all ({len(options)} elements)",
+            indent=False,
+            style={'font_weight': 'bold'}
+        )
+        select_all_checkbox.related_selector = selector
+        select_all_checkbox.observe(self._on_select_all_change, names="value")
+
+        container.children = (
+            select_all_checkbox,
+            widgets.HTML("<hr style='margin: 5px 0;'>"),
+            selector
+        )
+        # Materialized sections keep their widgets; expand/collapse after
+        # the first open is free
+        container._pending_elements = None
+
+    def _on_visibility_select_change(self, change):
+        """Apply a section selection diff as one batched figure update."""
+        if self._suppress_observer:
+            return
+
+        old_visible = set(change['old'])
+        new_visible = set(change['new'])
+        changed = old_visible ^ new_visible
+        if not changed:
+            return
+
+        for full_name in changed:
+            self.visualizer.visibility[full_name] = full_name in new_visible
+
         if self.visualizer._is_figure_widget:
             with self.visualizer.fig.batch_update():
-                for trace in self.visualizer.fig.data:
-                    if trace.name == full_name:
-                        trace.visible = is_visible
-                        break
+                for full_name in changed:
+                    idx = self._trace_index.get(full_name)
+                    if idx is not None:
+                        self.visualizer.fig.data[idx].visible = full_name in new_visible
         else:
-            self.visualizer.mesh_dict[full_name].visible = is_visible
-            for i, trace in enumerate(self.visualizer.fig.data):
-                if trace.name == full_name:
-                    self.visualizer.fig.data[i].visible = is_visible
-                    break
+            for full_name in changed:
+                self.visualizer.mesh_dict[full_name].visible = full_name in new_visible
+                idx = self._trace_index.get(full_name)
+                if idx is not None:
+                    self.visualizer.fig.data[idx].visible = full_name in new_visible
             self._update_viewer()
-        
-        if is_visible:
-            self._select_mesh(full_name)
-        else:
-            if self.visualizer.selected_mesh[0] == full_name:
-                self._deselect_current()
+
+        if self.visualizer.selected_mesh[0] in (old_visible - new_visible):
+            self._deselect_current()
 
     def _on_select_all_change(self, change):
         """Handle 'select all' checkbox changes."""
-        select_all_checkbox = change['owner']
-        new_value = change['new']
-        
-        if self.visualizer._is_figure_widget:
-            with self.visualizer.fig.batch_update():
-                for checkbox in select_all_checkbox.related_checkboxes:
-                    if checkbox.full_name in self.visualizer.mesh_dict:
-                        checkbox.value = new_value
-                        self.visualizer.visibility[checkbox.full_name] = new_value
-                        for trace in self.visualizer.fig.data:
-                            if trace.name == checkbox.full_name:
-                                trace.visible = new_value
-                                break
-        else:
-            for checkbox in select_all_checkbox.related_checkboxes:
-                if checkbox.full_name in self.visualizer.mesh_dict:
-                    checkbox.value = new_value
-                    self.visualizer.visibility[checkbox.full_name] = new_value
-                    self.visualizer.mesh_dict[checkbox.full_name].visible = new_value
-                    for i, trace in enumerate(self.visualizer.fig.data):
-                        if trace.name == checkbox.full_name:
-                            self.visualizer.fig.data[i].visible = new_value
-                            break
-            self._update_viewer()
+        selector = change['owner'].related_selector
+        # The selector's own observer applies the visibility diff in one
+        # batched update
+        selector.value = tuple(value for _, value in selector.options) if change['new'] else ()
+
+    def _expand_all_accordions(self):
+        """Open every accordion from the flat list built at creation.
+
+        Accordions only support a single open section, so each one gets
+        one representative open index instead of the old recursive loop
+        that assigned every index in turn and kept only the last.
+        """
+        for accordion in self._all_accordions:
+            if accordion.children:
+                accordion.selected_index = 0
 
-    def _expand_all_accordions(self, accordion):
-        """Recursively expand all accordions."""
-        for i in range(len(accordion.children)):
-            accordion.selected_index = i
-            child = accordion.children[i]
-            if hasattr(child, 'children') and isinstance(child.children[0], widgets.Accordion):
-                self._expand_all_accordions(child.children[0])
-
-    def _collapse_all_accordions(self, accordion):
-        """Recursively collapse all accordions."""
-        accordion.selected_index = None
-        for child in accordion.children:
-            if hasattr(child, 'children'):
-                for subchild in child.children:
-                    if isinstance(subchild, widgets.Accordion):
-                        subchild.selected_index = None
+    def _collapse_all_accordions(self):
+        """Close every accordion from the flat list built at creation."""
+        for accordion in self._all_accordions:
+            accordion.selected_index = None
@@ -4,9 +4,15 @@ Handles creation and configuration of 3D mesh visualizations.
 Uses FigureWidget for interactive click selection in Jupyter/Colab.
 """
 
-import json
 import numpy as np
 import plotly.graph_objects as go
+
+try:
+    # orjson decodes the large Custom_Mesh payloads 2-5x faster than stdlib json
+    import orjson as json
+except ImportError:
+    import json
+
 from .ifc_viewer_geometry import GeometryExtractor
 
 
@@ -36,11 +42,15 @@ class Visualizer3D:
         self.selected_mesh = [None]
         self.element_map = {}  # full_name -> IFC element reference
         self.geometry_extractor = geometry_extractor or GeometryExtractor()
+        # Built meshes queue here until flush_traces(); adding them to a
+        # FigureWidget one by one costs a validation pass and a frontend
+        # message per trace
+        self._pending_traces = []
 
-    def add_mesh_from_element(self, element, mesh_json, hierarchy_path, qto_props):
+    def add_mesh_from_element(self, element, mesh_json, hierarchy_path, qto_props, config_color=None):
         """
         Add a mesh to the visualization from an IFC element.
-        
+
         Parameters:
         -----------
         element : IFC element
@@ -51,12 +61,17 @@ class Visualizer3D:
             Path in hierarchy (e.g., "Storey_01/IfcWall")
         qto_props : dict
             Quantity takeoff properties
+        config_color : str, optional
+            Pre-resolved color from the YAML config; when given, skips the
+            per-element type lookup
         """
         try:
-            mesh_data = json.loads(mesh_json)
+            mesh_data = mesh_json if isinstance(mesh_json, dict) else json.loads(mesh_json)
+            # Index meshes once; the per-element next() scan was
+            # O(meshes) for every entry in "elements"
+            meshes_by_id = {m["mesh_id"]: m for m in mesh_data["meshes"]}
             for element_data in mesh_data["elements"]:
-                mesh_id = element_data["mesh_id"]
-                mesh_info = next((m for m in mesh_data["meshes"] if m["mesh_id"] == mesh_id), None)
+                mesh_info = meshes_by_id.get(element_data["mesh_id"])
                 if not mesh_info:
                     continue
                 
@@ -65,13 +80,23 @@ class Visualizer3D:
                     element_data["rotation"],
                     element_data["vector"]
                 )
-                indices = np.array(mesh_info["indices"], dtype=np.uint32)
+                # Contiguous float32 columns serialize as typed arrays;
+                # strided views of the (N, 3) block would make Plotly's
+                # validator fall back to copying per coordinate
+                xs, ys, zs = np.ascontiguousarray(vertices.T)
+                # One reshape+transpose yields contiguous i/j/k arrays;
+                # the 0::3 / 1::3 / 2::3 slices were three strided views
+                # each validated and copied separately
+                tri_i, tri_j, tri_k = np.ascontiguousarray(
+                    np.asarray(mesh_info["indices"], dtype=np.uint32).reshape(-1, 3).T
+                )
                 element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
                 full_name = f"{hierarchy_path}/{element_name}"
                 
                 # Try to get color from YAML config first, fall back to mesh data
-                config_color = self.geometry_extractor.get_color_for_element(element)
-                
+                if config_color is None:
+                    config_color = self.geometry_extractor.get_color_for_element(element)
+
                 if config_color:
                     # Use color from YAML config
                     if config_color.startswith('#'):
@@ -85,12 +110,12 @@ class Visualizer3D:
                     hex_color = f"#{r:02x}{g:02x}{b:02x}"
                 
                 mesh = go.Mesh3d(
-                    x=vertices[:, 0],
-                    y=vertices[:, 1],
-                    z=vertices[:, 2],
-                    i=indices[0::3],
-                    j=indices[1::3],
-                    k=indices[2::3],
+                    x=xs,
+                    y=ys,
+                    z=zs,
+                    i=tri_i,
+                    j=tri_j,
+                    k=tri_k,
                     color=hex_color,
                     opacity=element_data["color"]["a"] / 255,
                     name=full_name,
@@ -100,7 +125,7 @@ class Visualizer3D:
                     hoverlabel=dict(bgcolor='white', font_size=12),
                     showlegend=False
                 )
-                self.fig.add_trace(mesh)
+                self._pending_traces.append(mesh)
                 self.mesh_dict[full_name] = mesh
                 self.original_colors[full_name] = hex_color
                 self.visibility[full_name] = True
@@ -116,6 +141,80 @@ class Visualizer3D:
         except Exception as e:
             print(f"⚠️ Error processing mesh for {element.GlobalId}: {e}")
 
+    def add_mesh_from_geometry(self, element, vertices, faces, hierarchy_path, config_color=None):
+        """
+        Add a mesh from already-triangulated geometry arrays.
+
+        Used by the ifcopenshell geometry-iterator fallback, where vertices
+        and faces come straight from the C++ tessellation instead of a
+        Custom_Mesh JSON payload.
+
+        Parameters:
+        -----------
+        element : IFC element
+            The IFC element the geometry belongs to
+        vertices : np.ndarray
+            (N, 3) vertex coordinates
+        faces : np.ndarray
+            (M, 3) triangle indices
+        hierarchy_path : str
+            Path in hierarchy (e.g., "Storey_01/IfcWall")
+        config_color : str, optional
+            Pre-resolved color from the YAML config
+        """
+        try:
+            element_name = element.Name or f"{element.is_a()}_{element.GlobalId[:8]}"
+            full_name = f"{hierarchy_path}/{element_name}"
+            hex_color = config_color or self.geometry_extractor.get_color_for_element(element) or "#cccccc"
+
+            xs, ys, zs = np.ascontiguousarray(np.asarray(vertices, dtype=np.float32).T)
+            fi, fj, fk = np.ascontiguousarray(np.asarray(faces, dtype=np.uint32).T)
+            mesh = go.Mesh3d(
+                x=xs,
+                y=ys,
+                z=zs,
+                i=fi,
+                j=fj,
+                k=fk,
+                color=hex_color,
+                opacity=1.0,
+                name=full_name,
+                visible=True,
+                hoverinfo='name+text',
+                hovertext=f"{element_name}<br>Type: {element.is_a()}<br>GUID: {element.GlobalId[:8]}",
+                hoverlabel=dict(bgcolor='white', font_size=12),
+                showlegend=False
+            )
+            self._pending_traces.append(mesh)
+            self.mesh_dict[full_name] = mesh
+            self.original_colors[full_name] = hex_color
+            self.visibility[full_name] = True
+            self.element_map[full_name] = element
+            self.properties[full_name] = {
+                "Name": element_name,
+                "Type": element.is_a(),
+                "GUID": element.GlobalId,
+                "Hierarchy": hierarchy_path
+            }
+        except Exception as e:
+            print(f"⚠️ Error processing geometry for {element.GlobalId}: {e}")
+
+    def flush_traces(self):
+        """
+        Add all queued meshes to the figure in a single call.
+
+        Call once after a load loop; one add_traces inside batch_update
+        collapses N per-trace frontend syncs into one message.
+        """
+        if not self._pending_traces:
+            return
+        if self._is_figure_widget:
+            with self.fig.batch_update():
+                self.fig.add_traces(self._pending_traces)
+        else:
+            self.fig.add_traces(self._pending_traces)
+        self._pending_traces = []
+
     def attach_click_handlers(self, callback):
         """
         Attach click event handlers to all mesh traces.
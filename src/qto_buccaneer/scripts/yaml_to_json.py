@@ -0,0 +1,45 @@
+"""
+One-shot converter that emits a JSON sidecar next to each YAML config.
+
+The viewer's color-config loader prefers a `.json` sidecar when present,
+because JSON parses an order of magnitude faster than YAML. Run this after
+editing a YAML config to refresh its sidecar:
+
+    python -m qto_buccaneer.scripts.yaml_to_json path/to/config.yaml [...]
+
+Without arguments, converts the configs bundled with the colab viewer.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+
+def convert_yaml_to_json(yaml_path: Path) -> Path:
+    """Write a JSON sidecar for a single YAML file and return its path."""
+    yaml_path = Path(yaml_path)
+    with open(yaml_path, 'r') as f:
+        config = yaml.safe_load(f)
+
+    json_path = yaml_path.with_suffix('.json')
+    with open(json_path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+    return json_path
+
+
+def main(paths=None):
+    """Convert the given YAML configs (or the bundled viewer configs)."""
+    if not paths:
+        package_dir = Path(__file__).parent.parent
+        paths = sorted((package_dir / "colab_viewer" / "configs").glob("*.yaml"))
+
+    for yaml_path in paths:
+        json_path = convert_yaml_to_json(yaml_path)
+        print(f"✅ {yaml_path} -> {json_path}")
+
+
+if __name__ == "__main__":
+    main([Path(p) for p in sys.argv[1:]])